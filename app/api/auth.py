@@ -1,3 +1,5 @@
+import asyncio
+import logging
 from fastapi import APIRouter, HTTPException, status, Depends
 from datetime import timedelta
 from app.models.auth import UserRegister, UserLogin, UserResponse, UserResponseWithToken, Token
@@ -7,6 +9,8 @@ from app.services.supabase_service import supabase_service
 from app.services.profile_service import profile_service
 from app.api.dependencies import get_current_user
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
@@ -14,53 +18,58 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 async def register(user_data: UserRegister):
     """Register a new user and return access token"""
     try:
-        # Check if user already exists
-        existing_user = await supabase_service.get_user_by_email(user_data.email)
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User with this email already exists"
-            )
-        
-        # Create user
-        user = await auth_service.register_user(
+        # Attempt-create and existence check collapse into one upsert round-trip:
+        # None means a user with this email already exists
+        user = await auth_service.register_user_if_absent(
             email=user_data.email,
             password=user_data.password,
             full_name=user_data.full_name
         )
-        
+
         if not user:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create user"
-            )
-        
-        # Create profile entry for the new user
-        try:
-            # Create initial profile data with full name
-            profile_data = ProfileUpdate(
-                full_name=user_data.full_name
-            )
-            
-            # Create profile in database (username will be extracted from email in service)
-            await profile_service.create_or_update_profile(
-                user_id=user["id"],
-                profile_data=profile_data,
-                email=user_data.email
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="User with this email already exists"
             )
-            
-        except Exception as profile_error:
-            # Log the error but don't fail registration
-            print(f"Warning: Failed to create profile for user {user['id']}: {str(profile_error)}")
-            # Continue with registration even if profile creation fails
-        
+
+        async def create_initial_profile():
+            """Create profile entry for the new user (best-effort)"""
+            try:
+                # Create initial profile data with full name
+                profile_data = ProfileUpdate(
+                    full_name=user_data.full_name
+                )
+
+                # Create profile in database (username will be extracted from email in service)
+                await profile_service.create_or_update_profile(
+                    user_id=user["id"],
+                    profile_data=profile_data,
+                    email=user_data.email
+                )
+
+            except Exception as profile_error:
+                # Log the error but don't fail registration
+                logger.warning(f"Failed to create profile for user {user['id']}: {str(profile_error)}")
+                # Continue with registration even if profile creation fails
+
+        # Profile creation and token minting are independent, so mint the
+        # token while the profile insert is in flight
+        profile_task = asyncio.create_task(create_initial_profile())
+
         # Create access token for the new user
         access_token_expires = timedelta(minutes=auth_service.access_token_expire_minutes)
         access_token = auth_service.create_access_token(
-            data={"sub": user["id"], "email": user["email"]},
+            data={
+                "sub": user["id"],
+                "email": user["email"],
+                "full_name": user["full_name"],
+                "created_at": str(user["created_at"])
+            },
             expires_delta=access_token_expires
         )
-        
+
+        await profile_task
+
         return UserResponseWithToken(
             user=UserResponse(
                 id=user["id"],
@@ -76,7 +85,7 @@ async def register(user_data: UserRegister):
         # Re-raise HTTPException as-is to preserve the original error details
         raise
     except Exception as e:
-        print(f"Registration error: {str(e)}")
+        logger.exception(f"Registration error: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration failed: {str(e)}"
@@ -98,10 +107,15 @@ async def login(user_data: UserLogin):
         # Create access token
         access_token_expires = timedelta(minutes=auth_service.access_token_expire_minutes)
         access_token = auth_service.create_access_token(
-            data={"sub": user["id"], "email": user["email"]},
+            data={
+                "sub": user["id"],
+                "email": user["email"],
+                "full_name": user.get("full_name", ""),
+                "created_at": str(user.get("created_at", ""))
+            },
             expires_delta=access_token_expires
         )
-        
+
         return Token(
             user_id=user["id"],
             access_token=access_token,
@@ -125,6 +139,17 @@ async def login(user_data: UserLogin):
 async def get_current_user_info(current_user: UserResponse = Depends(get_current_user)):
     """Get current user information"""
     try:
+        # Tokens carry the profile claims since they were added at issuance,
+        # so the common case is answered straight from the decoded JWT. Only
+        # fall back to the database for tokens issued before the change.
+        if current_user.full_name is not None and current_user.created_at is not None:
+            return UserResponse(
+                id=current_user.user_id,
+                email=current_user.email,
+                full_name=current_user.full_name,
+                created_at=current_user.created_at
+            )
+
         user = await supabase_service.get_user_by_email(current_user.email)
         if not user:
             raise HTTPException(
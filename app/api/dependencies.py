@@ -1,13 +1,53 @@
+import hashlib
+import time
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 from app.services.auth_service import auth_service
 from app.models.auth import TokenData
+from app.utils.cache import TTLCache
 
 
 # Security scheme for JWT tokens
 security = HTTPBearer()
 
+# Variant for endpoints where auth is optional: returns None instead of
+# raising 403 when the Authorization header is absent
+optional_security = HTTPBearer(auto_error=False)
+
+# Verified tokens are cached briefly so repeat requests skip the signature
+# check. Keyed by SHA-256 of the token so raw bearer tokens never sit in memory.
+_token_cache = TTLCache(maxsize=10_000, ttl=300.0)
+
+
+async def _verify_cached(token: str) -> Optional[TokenData]:
+    """Verify a JWT, using the in-process cache for repeat tokens"""
+    cache_key = hashlib.sha256(token.encode()).digest()
+
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        token_data, expires_at = cached
+        # Never serve a token past its own exp claim
+        if expires_at is None or expires_at > time.time():
+            return token_data
+        _token_cache.pop(cache_key)
+        return None
+
+    # Signature verification is CPU-bound; keep it off the event loop
+    user_data = await run_in_threadpool(auth_service.get_current_user, token)
+    if user_data is None:
+        return None
+
+    token_data = TokenData(
+        user_id=user_data["id"],
+        email=user_data["email"],
+        full_name=user_data.get("full_name"),
+        created_at=user_data.get("created_at") or None
+    )
+    _token_cache.set(cache_key, (token_data, user_data.get("exp")))
+    return token_data
+
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenData:
     """Get current user from JWT token"""
@@ -16,32 +56,26 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
     try:
-        token = credentials.credentials
-        user_data = auth_service.get_current_user(token)
-        
-        if user_data is None:
+        token_data = await _verify_cached(credentials.credentials)
+
+        if token_data is None:
             raise credentials_exception
-        
-        return TokenData(user_id=user_data["id"], email=user_data["email"])
+
+        return token_data
     except Exception:
         raise credentials_exception
 
 
-async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Optional[TokenData]:
+async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)) -> Optional[TokenData]:
     """Get current user if token is provided, otherwise return None"""
+    if credentials is None:
+        # Anonymous request: nothing to verify
+        return None
+
     try:
-        if credentials is None:
-            return None
-        
-        token = credentials.credentials
-        user_data = auth_service.get_current_user(token)
-        
-        if user_data is None:
-            return None
-        
-        return TokenData(user_id=user_data["id"], email=user_data["email"])
+        return await _verify_cached(credentials.credentials)
     except Exception:
         return None
 
@@ -53,14 +87,13 @@ async def get_authenticated_user(credentials: HTTPAuthorizationCredentials = Dep
         detail="Authentication required",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
     try:
-        token = credentials.credentials
-        user_data = auth_service.get_current_user(token)
-        
-        if user_data is None:
+        token_data = await _verify_cached(credentials.credentials)
+
+        if token_data is None:
             raise credentials_exception
-        
-        return TokenData(user_id=user_data["id"], email=user_data["email"])
+
+        return token_data
     except Exception:
-        raise credentials_exception 
+        raise credentials_exception
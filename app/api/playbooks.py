@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, Request
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, Request, BackgroundTasks
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from typing import List, Optional, Dict, Any
+from pydantic import TypeAdapter
 import uuid
 import asyncio
+import hashlib
 from app.models.playbook import (
     PlaybookCreate, PlaybookResponse, PlaybookUpdate, 
     PlaybookSearch, PlaybookSearchResult, PlaybookUploadResponse,
@@ -19,52 +21,169 @@ from app.services.supabase_service import supabase_service
 from app.services.ai_service import ai_service
 from app.services.vector_service import vector_service
 from app.services.download_service import download_service
-from app.config import settings
-import json
+from app.services.version_service import version_service
+from app.services import ai_cache
+from app.services import view_buffer
+from app.utils.cache import TTLCache
+from app.config import settings, ALLOWED_FILE_TYPES
+import orjson
 import io
+import logging
 from datetime import datetime
 
-
-router = APIRouter(prefix="/playbooks", tags=["playbooks"])
-
-
-def convert_vector_embedding(playbook_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Convert vector_embedding from string to list if needed"""
+logger = logging.getLogger(__name__)
+
+# orjson serialization is also the app-wide default (app/main.py); set here
+# too so the heaviest list endpoints keep it even if the router is mounted
+# under a differently-configured app
+router = APIRouter(prefix="/playbooks", tags=["playbooks"], default_response_class=ORJSONResponse)
+
+_UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Cap on concurrent storage uploads per request so a many-file playbook
+# doesn't exhaust storage API connections or rate limits
+_UPLOAD_CONCURRENCY = 10
+
+# Resolved once at import so the per-chunk/per-file hot loops do plain local
+# lookups instead of walking the settings attribute chain each iteration
+_MAX_UPLOAD_BYTES = settings.max_file_size
+_FILE_EXTENSIONS = dict(settings.file_extensions)
+
+# The database file_type constraint only allows these values; other common
+# extensions map to txt. Built once at import instead of per upload request.
+_ALLOWED_DB_FILE_TYPES = frozenset({'md', 'pdf', 'csv', 'docx', 'txt'})
+_FILE_TYPE_MAP = {
+    'md': 'md',
+    'markdown': 'md',
+    'pdf': 'pdf',
+    'csv': 'csv',
+    'docx': 'docx',
+    'doc': 'docx',
+    'txt': 'txt',
+    'py': 'txt',
+    'python': 'txt',
+    'json': 'txt',
+    'yaml': 'txt',
+    'yml': 'txt',
+    'js': 'txt',
+    'html': 'txt',
+    'xml': 'txt',
+    'sql': 'txt',
+    'sh': 'txt',
+    'cfg': 'txt',
+    'conf': 'txt',
+    'ini': 'txt',
+    'log': 'txt'
+}
+_CONTENT_TYPE_MAP = {
+    'pdf': 'application/pdf',
+    'md': 'text/markdown',
+    'txt': 'text/plain',
+    'csv': 'text/csv',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+}
+# Validate whole list responses in one pydantic-core pass instead of
+# constructing response models row by row inside the async handlers
+_playbook_list_adapter = TypeAdapter(List[PlaybookResponse])
+_with_fork_list_adapter = TypeAdapter(List[PlaybookWithForkInfo])
+_notification_list_adapter = TypeAdapter(List[NotificationResponse])
+
+
+async def _read_upload_within_limit(file: UploadFile, running_total: int) -> tuple:
+    """Read an upload in chunks, enforcing the total size limit as bytes arrive.
+
+    Returns the file content, the updated running total and the SHA-256 hex
+    digest of the content — hashing happens in the same pass as the size
+    check, so the bytes are only walked once. Raises 413 as soon as the
+    combined size crosses the limit instead of buffering everything first.
+    """
+    buffer = bytearray()
+    content_hash = hashlib.sha256()
+    while True:
+        chunk = await file.read(_UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        running_total += len(chunk)
+        if running_total > _MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Total file size exceeds {_MAX_UPLOAD_BYTES} bytes"
+            )
+        content_hash.update(chunk)
+        buffer.extend(chunk)
+    return bytes(buffer), running_total, content_hash.hexdigest()
+
+
+def _original_playbook_view(row: Optional[Dict[str, Any]]) -> Optional[PlaybookResponse]:
+    """Build the trimmed original-playbook view embedded in fork responses.
+
+    The row comes from our own join (trusted), so model_construct skips
+    per-field validation; FastAPI still validates against response_model on
+    the way out. owner_id/files are intentionally blanked — the fork
+    endpoints don't surface them.
+    """
+    if not row:
+        return None
+    return PlaybookResponse.model_construct(
+        id=row['id'],
+        title=row['title'],
+        description=row['description'],
+        tags=row.get('tags', []),
+        stage=row.get('stage'),
+        owner_id="",
+        version=row['version'],
+        files={},
+        created_at=row['created_at'],
+        updated_at=row['created_at']  # Use created_at as fallback
+    )
+
+
+def convert_vector_embedding(playbook_data: Dict[str, Any], include_embedding: bool = True) -> Dict[str, Any]:
+    """Convert vector_embedding from string to list if needed.
+
+    Callers that drop the field from the response anyway pass
+    include_embedding=False to skip parsing the 768-float string entirely.
+    """
+    if not include_embedding:
+        playbook_data.pop('vector_embedding', None)
+        return playbook_data
     if playbook_data.get('vector_embedding') and isinstance(playbook_data['vector_embedding'], str):
         try:
-            playbook_data['vector_embedding'] = json.loads(playbook_data['vector_embedding'])
-        except (json.JSONDecodeError, TypeError):
+            playbook_data['vector_embedding'] = orjson.loads(playbook_data['vector_embedding'])
+        except (orjson.JSONDecodeError, TypeError):
             playbook_data['vector_embedding'] = None
     return playbook_data
 
 
+def _parse_iso_datetime(value: str, fallback: datetime) -> datetime:
+    """Parse an ISO-8601 timestamp, only paying for the Z-suffix rewrite
+    when Postgres actually sent one"""
+    try:
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        return datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return fallback
+
+
 def ensure_datetime_fields(playbook_data: Dict[str, Any]) -> Dict[str, Any]:
     """Ensure created_at and updated_at fields are valid datetime objects"""
-    from datetime import datetime
-    
-    # Handle created_at
-    if not playbook_data.get('created_at'):
-        playbook_data['created_at'] = datetime.utcnow()
-    elif isinstance(playbook_data['created_at'], str):
-        try:
-            playbook_data['created_at'] = datetime.fromisoformat(playbook_data['created_at'].replace('Z', '+00:00'))
-        except (ValueError, TypeError):
-            playbook_data['created_at'] = datetime.utcnow()
-    
-    # Handle updated_at
-    if not playbook_data.get('updated_at'):
-        playbook_data['updated_at'] = datetime.utcnow()
-    elif isinstance(playbook_data['updated_at'], str):
-        try:
-            playbook_data['updated_at'] = datetime.fromisoformat(playbook_data['updated_at'].replace('Z', '+00:00'))
-        except (ValueError, TypeError):
-            playbook_data['updated_at'] = datetime.utcnow()
-    
+    # One clock read shared by both fields instead of up to four utcnow calls
+    now = datetime.utcnow()
+
+    for field in ('created_at', 'updated_at'):
+        value = playbook_data.get(field)
+        if not value:
+            playbook_data[field] = now
+        elif isinstance(value, str):
+            playbook_data[field] = _parse_iso_datetime(value, now)
+
     return playbook_data
 
 
 @router.post("/upload", response_model=PlaybookUploadResponse)
 async def upload_playbook(
+    background_tasks: BackgroundTasks,
     title: str = Form(...),
     description: str = Form(...),
     blog_content: Optional[str] = Form(None),
@@ -73,18 +192,6 @@ async def upload_playbook(
 ):
     """Upload a new playbook with files (Authentication required)"""
     try:
-        # Validate file size and type
-        total_size = 0
-        for file in files:
-            total_size += len(await file.read())
-            await file.seek(0)  # Reset file pointer
-        
-        if total_size > settings.max_file_size:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"Total file size exceeds {settings.max_file_size} bytes"
-            )
-        
         # Create playbook data
         playbook_data = {
             "title": title,
@@ -98,85 +205,161 @@ async def upload_playbook(
             "vector_embedding": None
         }
         
-        # Upload files to storage and create playbook_files entries
-        uploaded_files = []
-        playbook_files_data = []
-        files_with_content = []  # Store files with their content for AI processing
-        
+        # Reject unsupported types up front, before reading any file body —
+        # the content type comes from the multipart headers, so a bad file at
+        # position N no longer costs N full reads first
         for file in files:
-            print(f"📁 Processing file: {file.filename} ({file.content_type})")
-            
-            if file.content_type not in settings.allowed_file_types:
+            if file.content_type not in ALLOWED_FILE_TYPES:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"File type {file.content_type} not allowed"
                 )
-            
+
+        # Upload files to storage and create playbook_files entries
+        uploaded_files = []
+        playbook_files_data = []
+        files_with_content = []  # Store files with their content for AI processing
+        total_size = 0
+
+        for file in files:
+            logger.debug("📁 Processing file: %s (%s)", file.filename, file.content_type)
+
             # Generate unique file path with new structure: playbook/{{user_id}}/version/filename
             file_id = str(uuid.uuid4())
-            file_extension = settings.file_extensions.get(file.content_type, "")
+            file_extension = _FILE_EXTENSIONS.get(file.content_type, "")
             # New folder structure: playbook/{{user_id}}/version/filename
             file_path = f"playbook/{current_user.user_id}/v1/{file_id}{file_extension}"
-            
-            # Read file content once and store it
-            file_content = await file.read()
-            print(f"📊 Read {len(file_content)} bytes from {file.filename}")
-            
-            # Upload to Supabase Storage
-            file_url = await supabase_service.upload_file_to_storage(
-                file_path, file_content, file.content_type
-            )
-            print(f"✅ Uploaded {file.filename} to storage")
-            
-            # Store file info for playbook
-            playbook_data["files"][file.filename] = file_url
-            uploaded_files.append(FileUpload(
-                filename=file.filename,
-                content_type=file.content_type,
-                size=len(file_content),
-                file_path=file_path
-            ))
-            
-            # Store file with content for AI processing
+
+            # Read file content once in chunks, enforcing the size limit and
+            # computing the content hash in the same pass
+            file_content, total_size, content_hash = await _read_upload_within_limit(file, total_size)
+            logger.debug("📊 Read %d bytes from %s", len(file_content), file.filename)
+
+            # Store file with content for upload and AI processing
             files_with_content.append({
-                "file": file,
                 "content": file_content,
                 "filename": file.filename,
-                "content_type": file.content_type
+                "content_type": file.content_type,
+                "file_path": file_path,
+                "sha256": content_hash
             })
-            
+
+            # Release Starlette's spooled copy of the upload right away so
+            # only one copy of each file's bytes stays in memory
+            await file.close()
+
+        # Bytes already in storage (same SHA-256) become server-side copies to
+        # the new path — the content never crosses the wire again. Each
+        # playbook keeps its own path so deletes stay independent.
+        known_blob_paths = await supabase_service.get_blob_paths_by_hashes(
+            [file_info["sha256"] for file_info in files_with_content]
+        )
+
+        # Upload all files to Supabase Storage concurrently, bounded so a
+        # many-file playbook doesn't hammer the storage API or rate limits
+        # (the semaphore is created here, not at module level, because
+        # asyncio primitives bind to the running loop on Python 3.9)
+        upload_semaphore = asyncio.Semaphore(_UPLOAD_CONCURRENCY)
+
+        async def upload_one(file_info):
+            async with upload_semaphore:
+                existing_path = known_blob_paths.get(file_info["sha256"])
+                if existing_path:
+                    copied_url = await supabase_service._copy_storage_object(
+                        existing_path, file_info["file_path"]
+                    )
+                    if copied_url is not None:
+                        logger.debug("♻️ Reused stored bytes for %s (content match)", file_info["filename"])
+                        return copied_url
+                file_url = await supabase_service.upload_file_to_storage(
+                    file_info["file_path"], file_info["content"], file_info["content_type"]
+                )
+                # Record the canonical path off the hot path (best-effort)
+                asyncio.create_task(supabase_service.put_blob_path(
+                    file_info["sha256"], file_info["file_path"]
+                ))
+                return file_url
+
+        upload_results = await asyncio.gather(
+            *[upload_one(file_info) for file_info in files_with_content],
+            return_exceptions=True
+        )
+
+        for file_info, file_url in zip(files_with_content, upload_results):
+            if isinstance(file_url, Exception):
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to upload {file_info['filename']}: {file_url}"
+                )
+            logger.debug("✅ Uploaded %s to storage", file_info["filename"])
+
+            # Store file info for playbook
+            playbook_data["files"][file_info["filename"]] = file_url
+            uploaded_files.append(FileUpload(
+                filename=file_info["filename"],
+                content_type=file_info["content_type"],
+                size=len(file_info["content"]),
+                file_path=file_info["file_path"]
+            ))
+
             # Prepare data for playbook_files table
-            file_type = file.content_type.split('/')[-1] if '/' in file.content_type else 'txt'
+            content_type = file_info["content_type"]
+            file_type = content_type.split('/')[-1] if '/' in content_type else 'txt'
             playbook_files_data.append({
-                "file_name": file.filename,
+                "file_name": file_info["filename"],
                 "file_type": file_type,
                 "storage_path": file_url,
-                # "file_size": len(file_content),  # Temporarily removed due to missing column
+                # "file_size": len(file_info["content"]),  # Temporarily removed due to missing column
                 "uploaded_by": current_user.user_id,
                 "version_created": 1,  # Initial version
                 "is_active": True
             })
         
-        # Extract text content from files for vector storage (using stored content)
-        files_for_vector_storage = []
-        for file_info in files_with_content:
-            try:
-                # Extract text content for embedding
-                text_content = await ai_service.extract_text_from_file(
+        # Content that has been ingested before (same SHA-256) reuses its
+        # stored extraction instead of re-running the parsers
+        extracted_by_hash = await supabase_service.get_extractions_by_hashes(
+            [file_info["sha256"] for file_info in files_with_content]
+        )
+        files_to_extract = [
+            file_info for file_info in files_with_content
+            if file_info["sha256"] not in extracted_by_hash
+        ]
+
+        # Extract text content from the remaining files concurrently,
+        # reusing the in-memory content (no re-download from storage)
+        extraction_results = await asyncio.gather(
+            *[
+                ai_service.extract_text_from_file(
                     file_info["content"],
                     file_info["filename"],
                     file_info["content_type"]
                 )
-            
-                files_for_vector_storage.append({
-                    "filename": file_info["filename"],
-                    "content": text_content,
-                    "content_type": file_info["content_type"]
-                })
-                print(f"✅ Extracted text from {file_info['filename']} for vector storage")
-            except Exception as e:
-                print(f"⚠️ Failed to extract text from {file_info['filename']}: {e}")
+                for file_info in files_to_extract
+            ],
+            return_exceptions=True
+        )
+
+        for file_info, text_content in zip(files_to_extract, extraction_results):
+            if isinstance(text_content, Exception):
+                logger.warning("⚠️ Failed to extract text from %s: %s", file_info["filename"], text_content)
                 continue
+
+            extracted_by_hash[file_info["sha256"]] = text_content
+            # Write back to the dedupe cache (best-effort, off the hot path)
+            asyncio.create_task(supabase_service.put_extraction_by_hash(
+                file_info["sha256"], file_info["content_type"], text_content
+            ))
+            logger.debug("✅ Extracted text from %s for vector storage", file_info["filename"])
+
+        files_for_vector_storage = [
+            {
+                "filename": file_info["filename"],
+                "content": extracted_by_hash[file_info["sha256"]],
+                "content_type": file_info["content_type"]
+            }
+            for file_info in files_with_content
+            if file_info["sha256"] in extracted_by_hash
+        ]
         
         # Create playbook in database first to get the ID
         playbook = await supabase_service.create_playbook(playbook_data)
@@ -212,43 +395,62 @@ async def upload_playbook(
             ).execute()
             
             if response.data:
-                print(f"✅ Created initial version {response.data} for playbook {playbook['id']}")
+                logger.debug("✅ Created initial version %s for playbook %s", response.data, playbook["id"])
             else:
-                print(f"⚠️ Failed to create initial version for playbook {playbook['id']}")
+                logger.warning("⚠️ Failed to create initial version for playbook %s", playbook["id"])
                 
         except Exception as version_error:
-            print(f"⚠️ Failed to create initial version: {version_error}")
+            logger.warning("⚠️ Failed to create initial version: %s", version_error)
             # Continue with the upload process even if version creation fails
         
-        # Create playbook_files entries for all uploaded files
-        # for file_data in playbook_files_data:
-        #     file_data["playbook_id"] = playbook["id"]
-        #     await supabase_service.create_playbook_file(file_data)
-        
+        # Create playbook_files entries for all uploaded files in one bulk
+        # insert (one DB round-trip regardless of file count); non-fatal so a
+        # schema mismatch doesn't fail an upload whose files are already stored
+        try:
+            for file_data in playbook_files_data:
+                file_data["playbook_id"] = playbook["id"]
+            await supabase_service.create_playbook_files_bulk(playbook_files_data)
+        except Exception as files_error:
+            logger.warning("⚠️ Failed to create playbook_files entries: %s", files_error)
+
+
         # Process files with AI synchronously to get tags and summary (fast response)
-        print(f"🚀 Starting synchronous AI processing for {len(files_with_content)} files...")
-        
-        # Prepare files for AI processing
-        files_for_ai = []
-        for file_info in files_with_content:
-            try:
-                files_for_ai.append({
-                    "filename": file_info["filename"],
-                    "content": file_info["content"],
-                    "content_type": file_info["content_type"]
-                })
-                print(f"✅ Prepared {file_info['filename']} for AI processing")
-            except Exception as e:
-                print(f"⚠️ Failed to prepare {file_info['filename']}: {e}")
-                continue
-        
-        # Process with AI to get tags, summary, and stage (synchronous - fast)
-        ai_results = await ai_service.process_playbook_files(files_for_ai, title, description, blog_content)
-        
-        print(f"✅ Synchronous AI processing completed")
-        print(f"📝 Summary: {ai_results['summary'][:100]}...")
-        print(f"🏷️ Tags: {ai_results['tags']}")
-        print(f"📈 Stage: {ai_results['stage']}")
+        logger.info("🚀 Starting synchronous AI processing for %d files...", len(files_with_content))
+        
+        # Prepare files for AI processing — passes the text we already
+        # extracted above so process_playbook_files doesn't parse the same
+        # bytes a second time (raw content stays as fallback for files whose
+        # extraction failed)
+        files_for_ai = [
+            {
+                "filename": file_info["filename"],
+                "content": file_info["content"],
+                "content_type": file_info["content_type"],
+                "text": extracted_by_hash.get(file_info["sha256"])
+            }
+            for file_info in files_with_content
+        ]
+
+        # Identical content (same title/description/blog + file bytes) has
+        # deterministic AI results, so reuse them instead of paying the LLM
+        # round-trip again — common on re-uploads and retries
+        ai_cache_key = ai_cache.build_ai_results_key(
+            title, description, blog_content,
+            [file_info["sha256"] for file_info in files_with_content]
+        )
+        ai_results = await ai_cache.get_ai_results(ai_cache_key)
+        if ai_results is not None:
+            logger.info("✅ Reusing cached AI results for identical content")
+        else:
+            # Process with AI to get tags, summary, and stage (synchronous - fast)
+            ai_results = await ai_service.process_playbook_files(files_for_ai, title, description, blog_content)
+            # Write back off the hot path (best-effort)
+            asyncio.create_task(ai_cache.put_ai_results(ai_cache_key, ai_results))
+
+        logger.info("✅ Synchronous AI processing completed")
+        logger.debug("📝 Summary: %.100s...", ai_results["summary"])
+        logger.debug("🏷️ Tags: %s", ai_results["tags"])
+        logger.debug("📈 Stage: %s", ai_results["stage"])
         
         # Update playbook with AI results immediately (without embedding)
         update_data = {
@@ -258,51 +460,39 @@ async def upload_playbook(
             "vector_embedding": None  # Will be updated in background
         }
         
-        print(f"💾 Updating playbook {playbook['id']} with AI results...")
+        logger.debug("💾 Updating playbook %s with AI results...", playbook["id"])
         updated_playbook = await supabase_service.update_playbook(playbook["id"], update_data)
         
         # Start background embedding processing
-        print(f"🔄 Starting background embedding processing...")
+        logger.debug("🔄 Starting background embedding processing...")
         # Use the already extracted text from files_for_vector_storage
         all_text = ""
         for file_info in files_for_vector_storage:
             all_text += f"\n\n--- {file_info['filename']} ---\n{file_info['content']}"
         
-        # Start background task for embedding
-        asyncio.create_task(
-            ai_service.process_playbook_embedding_background(
-                playbook["id"], 
-                title, 
-                description, 
-                all_text, 
-                blog_content
-            )
+        # Kick off embedding generation and per-file vector storage together
+        # after the response is sent — the client shouldn't wait on vector DB
+        # writes. BackgroundTasks keeps a strong reference to the coroutine
+        # (a bare create_task can be garbage-collected mid-flight) and runs
+        # it once the response has gone out.
+        background_tasks.add_task(
+            _post_upload_processing,
+            playbook["id"],
+            title,
+            description,
+            blog_content,
+            all_text,
+            files_for_vector_storage
         )
-        
-        # Store individual file vectors for search functionality
-        print(f"🔍 Storing file vectors for search...")
-        try:
-            vector_storage_result = await vector_service.store_file_vectors(
-                files_for_vector_storage, 
-                playbook["id"]
-            )
-            
-            if vector_storage_result["success"]:
-                print(f"✅ Stored vectors for {vector_storage_result['stored_count']} files")
-            else:
-                print(f"⚠️ Vector storage failed: {vector_storage_result.get('error', 'Unknown error')}")
-                
-        except Exception as e:
-            print(f"⚠️ Failed to store file vectors: {e}")
-        
+
         # Convert vector_embedding from string to list if needed
         updated_playbook = convert_vector_embedding(updated_playbook)
-        
+
         return PlaybookUploadResponse(
-            playbook=PlaybookResponse(**updated_playbook),
+            playbook=PlaybookResponse.model_validate(updated_playbook),
             files=uploaded_files,
             processing_status="completed",
-            message="Playbook uploaded successfully with AI insights. Vector embedding processing in background."
+            message="Playbook uploaded successfully with AI insights. Vector embedding and file indexing continuing in background."
         )
     
     except Exception as e:
@@ -312,10 +502,55 @@ async def upload_playbook(
         )
 
 
+async def _post_upload_processing(
+    playbook_id: str,
+    title: str,
+    description: str,
+    blog_content: Optional[str],
+    all_text: str,
+    files_for_vector_storage: List[Dict]
+):
+    """Run embedding generation and file vector storage after the upload response"""
+
+    async def store_vectors():
+        logger.info("🔍 Storing file vectors for search...")
+        try:
+            vector_storage_result = await vector_service.store_file_vectors(
+                files_for_vector_storage,
+                playbook_id
+            )
+
+            if vector_storage_result["success"]:
+                logger.info(f"✅ Stored vectors for {vector_storage_result['stored_count']} files")
+            else:
+                logger.warning(f"⚠️ Vector storage failed: {vector_storage_result.get('error', 'Unknown error')}")
+
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to store file vectors: {e}")
+
+    # The playbook-level embedding and the per-file vectors are independent,
+    # so let them run concurrently — and isolate their failures, so one
+    # failing doesn't abandon the other mid-flight
+    results = await asyncio.gather(
+        ai_service.process_playbook_embedding_background(
+            playbook_id,
+            title,
+            description,
+            all_text,
+            blog_content
+        ),
+        store_vectors(),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("⚠️ Post-upload processing step failed: %s", result)
+
+
 async def process_playbook_ai_with_content(playbook_id: str, files_with_content: List[Dict], title: str, description: str, blog_content: Optional[str] = None):
     """Process playbook files with AI in background using files with content already available"""
     try:
-        print(f"🤖 Starting AI processing for playbook {playbook_id}")
+        logger.info(f"🤖 Starting AI processing for playbook {playbook_id}")
         
         # Prepare files for AI processing using stored content
         files_for_ai = []
@@ -326,25 +561,25 @@ async def process_playbook_ai_with_content(playbook_id: str, files_with_content:
                     "content": file_info["content"],
                     "content_type": file_info["content_type"]
                 })
-                print(f"✅ Prepared {file_info['filename']} for AI processing")
+                logger.info(f"✅ Prepared {file_info['filename']} for AI processing")
             except Exception as e:
-                print(f"⚠️ Failed to prepare {file_info['filename']}: {e}")
+                logger.warning(f"⚠️ Failed to prepare {file_info['filename']}: {e}")
                 continue
-        
+
         if not files_for_ai:
-            print(f"❌ No files available for AI processing for playbook {playbook_id}")
+            logger.error(f"❌ No files available for AI processing for playbook {playbook_id}")
             return
-        
-        print(f"📊 Processing {len(files_for_ai)} files with AI...")
+
+        logger.info(f"📊 Processing {len(files_for_ai)} files with AI...")
         
         # Process with AI (include blog_content in processing)
         ai_results = await ai_service.process_playbook_files(files_for_ai, title, description, blog_content)
         
-        print(f"✅ AI processing completed for playbook {playbook_id}")
-        print(f"📝 Summary: {ai_results['summary'][:100]}...")
-        print(f"🏷️ Tags: {ai_results['tags']}")
-        print(f"📈 Stage: {ai_results['stage']}")
-        print(f"🔢 Embedding dimensions: {len(ai_results['embedding'])}")
+        logger.info(f"✅ AI processing completed for playbook {playbook_id}")
+        logger.info(f"📝 Summary: {ai_results['summary'][:100]}...")
+        logger.info(f"🏷️ Tags: {ai_results['tags']}")
+        logger.info(f"📈 Stage: {ai_results['stage']}")
+        logger.info(f"🔢 Embedding dimensions: {len(ai_results['embedding'])}")
         
         # Update playbook with AI results
         update_data = {
@@ -354,12 +589,12 @@ async def process_playbook_ai_with_content(playbook_id: str, files_with_content:
             "vector_embedding": ai_results["embedding"]
         }
         
-        print(f"💾 Updating playbook {playbook_id} with AI results...")
+        logger.info(f"💾 Updating playbook {playbook_id} with AI results...")
         await supabase_service.update_playbook(playbook_id, update_data)
-        print(f"✅ Playbook {playbook_id} updated successfully with vector embedding")
-        
+        logger.info(f"✅ Playbook {playbook_id} updated successfully with vector embedding")
+
     except Exception as e:
-        print(f"❌ Error processing playbook {playbook_id}: {str(e)}")
+        logger.exception(f"❌ Error processing playbook {playbook_id}: {str(e)}")
         # Try to update with error information
         try:
             error_update = {
@@ -374,79 +609,89 @@ async def process_playbook_ai_with_content(playbook_id: str, files_with_content:
 
 async def store_file_vectors_for_playbook(playbook_id: str, files_with_content: List[Dict]):
     """Store individual file vectors for search functionality"""
-    print(f"🔍 Storing file vectors for search...")
+    logger.info("🔍 Storing file vectors for search...")
     try:
         from app.services.vector_service import vector_service
         
-        # Prepare files for vector storage
-        files_for_vector_storage = []
-        for file_info in files_with_content:
-            try:
-                text_content = await ai_service.extract_text_from_file(
+        # Extract all files concurrently, then hand the whole list to
+        # store_file_vectors, which embeds them in one batched API call and
+        # bulk-inserts the vectors
+        extraction_results = await asyncio.gather(
+            *[
+                ai_service.extract_text_from_file(
                     file_info["content"],
                     file_info["filename"],
                     file_info["content_type"]
                 )
-                files_for_vector_storage.append({
-                    "filename": file_info["filename"],
-                    "content": text_content,
-                    "content_type": file_info["content_type"]
-                })
-                print(f"✅ Extracted text from {file_info['filename']} for vector storage")
-            except Exception as e:
-                print(f"⚠️ Failed to extract text from {file_info['filename']}: {e}")
+                for file_info in files_with_content
+            ],
+            return_exceptions=True
+        )
+
+        files_for_vector_storage = []
+        for file_info, text_content in zip(files_with_content, extraction_results):
+            if isinstance(text_content, Exception):
+                logger.warning(f"⚠️ Failed to extract text from {file_info['filename']}: {text_content}")
                 continue
-        
+            files_for_vector_storage.append({
+                "filename": file_info["filename"],
+                "content": text_content,
+                "content_type": file_info["content_type"]
+            })
+            logger.info(f"✅ Extracted text from {file_info['filename']} for vector storage")
+
         # Store vectors for each file
         if files_for_vector_storage:
-            await vector_service.store_file_vectors(playbook_id, files_for_vector_storage)
-            print(f"✅ Stored vectors for {len(files_for_vector_storage)} files")
+            await vector_service.store_file_vectors(files_for_vector_storage, playbook_id)
+            logger.info(f"✅ Stored vectors for {len(files_for_vector_storage)} files")
         else:
-            print(f"⚠️ No files available for vector storage")
-            
+            logger.warning("⚠️ No files available for vector storage")
+
     except Exception as e:
-        print(f"⚠️ Failed to store file vectors: {e}")
+        logger.warning(f"⚠️ Failed to store file vectors: {e}")
         # Continue processing even if vector storage fails
 
 
 async def process_playbook_ai(playbook_id: str, files: List[FileUpload], title: str, description: str, blog_content: Optional[str] = None):
     """Process playbook files with AI in background (legacy function for when files need to be downloaded)"""
     try:
-        print(f"🤖 Starting AI processing for playbook {playbook_id}")
+        logger.info(f"🤖 Starting AI processing for playbook {playbook_id}")
         
         # Prepare files for AI processing
         files_for_ai = []
         for file_info in files:
             try:
-                # Download file content for AI processing
-                file_content = await supabase_service.client.storage.from_(
-                    settings.storage_bucket_name
-                ).download(file_info.file_path)
-                
+                # Download file content for AI processing (sync SDK call, so
+                # run it in a thread instead of blocking the event loop)
+                file_content = await asyncio.to_thread(
+                    supabase_service.client.storage.from_(settings.storage_bucket_name).download,
+                    file_info.file_path
+                )
+
                 files_for_ai.append({
                     "filename": file_info.filename,
                     "content": file_content,
                     "content_type": file_info.content_type
                 })
-                print(f"✅ Downloaded {file_info.filename} for AI processing")
+                logger.info(f"✅ Downloaded {file_info.filename} for AI processing")
             except Exception as e:
-                print(f"⚠️ Failed to download {file_info.filename}: {e}")
+                logger.warning(f"⚠️ Failed to download {file_info.filename}: {e}")
                 continue
         
         if not files_for_ai:
-            print(f"❌ No files available for AI processing for playbook {playbook_id}")
+            logger.error(f"❌ No files available for AI processing for playbook {playbook_id}")
             return
-        
-        print(f"📊 Processing {len(files_for_ai)} files with AI...")
+
+        logger.info(f"📊 Processing {len(files_for_ai)} files with AI...")
         
         # Process with AI (include blog_content in processing)
         ai_results = await ai_service.process_playbook_files(files_for_ai, title, description, blog_content)
         
-        print(f"✅ AI processing completed for playbook {playbook_id}")
-        print(f"📝 Summary: {ai_results['summary'][:100]}...")
-        print(f"🏷️ Tags: {ai_results['tags']}")
-        print(f"📈 Stage: {ai_results['stage']}")
-        print(f"🔢 Embedding dimensions: {len(ai_results['embedding'])}")
+        logger.info(f"✅ AI processing completed for playbook {playbook_id}")
+        logger.info(f"📝 Summary: {ai_results['summary'][:100]}...")
+        logger.info(f"🏷️ Tags: {ai_results['tags']}")
+        logger.info(f"📈 Stage: {ai_results['stage']}")
+        logger.info(f"🔢 Embedding dimensions: {len(ai_results['embedding'])}")
         
         # Update playbook with AI results
         update_data = {
@@ -456,12 +701,12 @@ async def process_playbook_ai(playbook_id: str, files: List[FileUpload], title:
             "vector_embedding": ai_results["embedding"]
         }
         
-        print(f"💾 Updating playbook {playbook_id} with AI results...")
+        logger.info(f"💾 Updating playbook {playbook_id} with AI results...")
         await supabase_service.update_playbook(playbook_id, update_data)
-        print(f"✅ Playbook {playbook_id} updated successfully with vector embedding")
-        
+        logger.info(f"✅ Playbook {playbook_id} updated successfully with vector embedding")
+
     except Exception as e:
-        print(f"❌ Error processing playbook {playbook_id}: {str(e)}")
+        logger.exception(f"❌ Error processing playbook {playbook_id}: {str(e)}")
         # Try to update with error information
         try:
             error_update = {
@@ -484,7 +729,9 @@ async def get_playbooks(
     try:
         user_id = current_user.user_id if current_user else None
         playbooks = await supabase_service.get_playbooks(user_id, limit, offset)
-        return [PlaybookResponse(**convert_vector_embedding(playbook)) for playbook in playbooks]
+        return _playbook_list_adapter.validate_python(
+            [convert_vector_embedding(playbook) for playbook in playbooks]
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -492,6 +739,16 @@ async def get_playbooks(
         )
 
 
+async def _cleaned_list(fetch_coro, adapter: TypeAdapter):
+    """Shared body of the my-playbooks family: fetch rows, drop the embedding
+    column in place (rows are per-request PostgREST results), and batch-
+    validate the list in one pydantic-core pass"""
+    rows = await fetch_coro
+    for row in rows:
+        row.pop('vector_embedding', None)
+    return adapter.validate_python(rows)
+
+
 @router.get("/my-playbooks", response_model=List[PlaybookResponse])
 async def get_my_playbooks(
     limit: int = 50,
@@ -500,19 +757,10 @@ async def get_my_playbooks(
 ):
     """Get playbooks owned by the current user"""
     try:
-        user_id = current_user.user_id
-        playbooks = await supabase_service.get_playbooks_by_user_detailed(user_id, limit, offset)
-        
-        # Remove vector_embedding from response to reduce payload size
-        cleaned_playbooks = []
-        for playbook in playbooks:
-            # Create a copy without vector_embedding
-            playbook_copy = playbook.copy()
-            if 'vector_embedding' in playbook_copy:
-                del playbook_copy['vector_embedding']
-            cleaned_playbooks.append(PlaybookResponse(**playbook_copy))
-        
-        return cleaned_playbooks
+        return await _cleaned_list(
+            supabase_service.get_playbooks_by_user_detailed(current_user.user_id, limit, offset),
+            _playbook_list_adapter
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -528,19 +776,10 @@ async def get_my_playbooks_enhanced(
 ):
     """Get playbooks owned by the current user with fork information"""
     try:
-        user_id = current_user.user_id
-        playbooks = await supabase_service.get_playbooks_with_fork_info(user_id, limit, offset)
-        
-        # Remove vector_embedding from response to reduce payload size
-        cleaned_playbooks = []
-        for playbook in playbooks:
-            # Create a copy without vector_embedding
-            playbook_copy = playbook.copy()
-            if 'vector_embedding' in playbook_copy:
-                del playbook_copy['vector_embedding']
-            cleaned_playbooks.append(PlaybookWithForkInfo(**playbook_copy))
-        
-        return cleaned_playbooks
+        return await _cleaned_list(
+            supabase_service.get_playbooks_with_fork_info(current_user.user_id, limit, offset),
+            _with_fork_list_adapter
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -556,19 +795,10 @@ async def get_my_forks(
 ):
     """Get playbooks forked by the current user"""
     try:
-        user_id = current_user.user_id
-        forked_playbooks = await supabase_service.get_user_playbooks_with_fork_info(user_id, limit, offset)
-        
-        # Remove vector_embedding from response to reduce payload size
-        cleaned_playbooks = []
-        for playbook in forked_playbooks:
-            # Create a copy without vector_embedding
-            playbook_copy = playbook.copy()
-            if 'vector_embedding' in playbook_copy:
-                del playbook_copy['vector_embedding']
-            cleaned_playbooks.append(PlaybookWithForkInfo(**playbook_copy))
-        
-        return cleaned_playbooks
+        return await _cleaned_list(
+            supabase_service.get_user_playbooks_with_fork_info(current_user.user_id, limit, offset),
+            _with_fork_list_adapter
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -584,19 +814,10 @@ async def get_my_playbooks_combined(
 ):
     """Get both owned and forked playbooks for the current user"""
     try:
-        user_id = current_user.user_id
-        combined_playbooks = await supabase_service.get_combined_user_playbooks(user_id, limit, offset)
-        
-        # Remove vector_embedding from response to reduce payload size
-        cleaned_playbooks = []
-        for playbook in combined_playbooks:
-            # Create a copy without vector_embedding
-            playbook_copy = playbook.copy()
-            if 'vector_embedding' in playbook_copy:
-                del playbook_copy['vector_embedding']
-            cleaned_playbooks.append(PlaybookWithForkInfo(**playbook_copy))
-        
-        return cleaned_playbooks
+        return await _cleaned_list(
+            supabase_service.get_combined_user_playbooks(current_user.user_id, limit, offset),
+            _with_fork_list_adapter
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -613,28 +834,11 @@ async def get_notifications(
     """Get notifications for the current user (fork events on their playbooks)"""
     try:
         user_id = current_user.user_id
+        # Rows with missing required fields are filtered out in the query
+        # itself, so pages come back full and no Python-side validation loop
+        # is needed
         notifications = await supabase_service.get_user_notifications(user_id, limit, offset)
-        
-        # Filter out any notifications with missing required fields
-        valid_notifications = []
-        for notification in notifications:
-            try:
-                # Validate that all required fields are present
-                if all([
-                    notification.get('playbook_id'),
-                    notification.get('playbook_title'),
-                    notification.get('user_id'),
-                    notification.get('user_email'),
-                    notification.get('user_full_name')
-                ]):
-                    valid_notifications.append(NotificationResponse(**notification))
-                else:
-                    print(f"Skipping invalid notification: {notification}")
-            except Exception as validation_error:
-                print(f"Validation error for notification: {validation_error}")
-                continue
-        
-        return valid_notifications
+        return _notification_list_adapter.validate_python(notifications)
     except Exception as e:
         print(f"Error in get_notifications endpoint: {str(e)}")
         # Return empty list instead of error to prevent API failure
@@ -658,30 +862,57 @@ async def get_notification_count(
         )
 
 
+# Popularity moves slowly, so serve the built response list from a short
+# in-process cache keyed by limit; the lock stops a thundering herd from
+# hitting the aggregation RPC together on a cold key (created lazily because
+# asyncio primitives bind to the running loop on Python 3.9)
+_popular_cache = TTLCache(maxsize=16, ttl=60.0)
+_popular_lock: Optional[asyncio.Lock] = None
+
+# Built vector-search responses keyed by (normalized query, limit); rankings
+# shift only when playbooks change, so a short TTL absorbs repeat searches
+_vector_search_cache = TTLCache(maxsize=256, ttl=60.0)
+
+
 @router.get("/popular", response_model=List[PopularPlaybookResponse])
 async def get_popular_playbooks(
     limit: int = 10,
     current_user: Optional[TokenData] = Depends(get_optional_user)
 ):
     """Get most popular playbooks"""
+    global _popular_lock
     try:
-        popular_playbooks = await supabase_service.get_popular_playbooks(limit)
-        
-        # Transform the response to match PopularPlaybookResponse model
-        response_playbooks = []
-        for playbook_data in popular_playbooks:
-            popular_response = PopularPlaybookResponse(
-                playbook_id=playbook_data['id'],
-                title=playbook_data['title'],
-                description=playbook_data['description'],
-                star_count=playbook_data['star_count'],
-                view_count=playbook_data['view_count'],
-                created_at=playbook_data['created_at']
-            )
-            response_playbooks.append(popular_response)
-        
-        return response_playbooks
-        
+        cached = _popular_cache.get(limit)
+        if cached is not None:
+            return cached
+
+        if _popular_lock is None:
+            _popular_lock = asyncio.Lock()
+
+        async with _popular_lock:
+            # Another coroutine may have populated the key while we waited
+            cached = _popular_cache.get(limit)
+            if cached is not None:
+                return cached
+
+            popular_playbooks = await supabase_service.get_popular_playbooks(limit)
+
+            # Transform the response to match PopularPlaybookResponse model
+            response_playbooks = []
+            for playbook_data in popular_playbooks:
+                popular_response = PopularPlaybookResponse(
+                    playbook_id=playbook_data['id'],
+                    title=playbook_data['title'],
+                    description=playbook_data['description'],
+                    star_count=playbook_data['star_count'],
+                    view_count=playbook_data['view_count'],
+                    created_at=playbook_data['created_at']
+                )
+                response_playbooks.append(popular_response)
+
+            _popular_cache.set(limit, response_playbooks)
+            return response_playbooks
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -703,25 +934,13 @@ async def get_playbook(
                 detail="Playbook not found"
             )
         
-        # Record view (in background to avoid blocking the response)
-        try:
-            # Record the view asynchronously
-            import asyncio
-            asyncio.create_task(
-                supabase_service.record_playbook_view(
-                    playbook_id=playbook_id,
-                    user_id=current_user.user_id if current_user else None
-                )
-            )
-        except Exception as view_error:
-            # Don't fail the request if view recording fails
-            print(f"Warning: Failed to record view for playbook {playbook_id}: {view_error}")
-        
-        # Convert and exclude vector_embedding from response
-        playbook_data = convert_vector_embedding(playbook)
-        if 'vector_embedding' in playbook_data:
-            del playbook_data['vector_embedding']
+        # Record view through the buffered flusher — O(1) enqueue, no DB
+        # write and no per-request task on this path
+        view_buffer.record_view(playbook_id)
         
+        # Exclude vector_embedding from the response without parsing it
+        playbook_data = convert_vector_embedding(playbook, include_embedding=False)
+
         return playbook_data
     except Exception as e:
         raise HTTPException(
@@ -741,11 +960,9 @@ async def get_playbook_detailed(playbook_id: str):
                 detail="Playbook not found"
             )
         
-        # Convert and exclude vector_embedding from response
-        playbook_data = convert_vector_embedding(playbook)
-        if 'vector_embedding' in playbook_data:
-            del playbook_data['vector_embedding']
-        
+        # Exclude vector_embedding from the response without parsing it
+        playbook_data = convert_vector_embedding(playbook, include_embedding=False)
+
         return PlaybookDetailedResponse(**playbook_data)
     except Exception as e:
         raise HTTPException(
@@ -762,38 +979,40 @@ async def get_playbook_forks(
 ):
     """Get list of users who forked a specific playbook"""
     try:
-        # Verify playbook exists
-        playbook = await supabase_service.get_playbook(playbook_id)
+        # The existence check and the fork fetch are independent reads
+        playbook, forks = await asyncio.gather(
+            supabase_service.get_playbook(playbook_id),
+            supabase_service.get_playbook_forks(playbook_id, limit, offset)
+        )
         if not playbook:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Playbook not found"
             )
-        
-        # Get fork information
-        forks = await supabase_service.get_playbook_forks(playbook_id, limit, offset)
-        
-        # Transform the response
-        fork_list = []
-        for fork in forks:
-            user_info = fork.get('users', {}) or {}
-            # Only include forks with valid user data
-            if user_info.get('id') and user_info.get('email'):
-                fork_info = {
-                    'user_id': user_info.get('id'),
-                    'user_email': user_info.get('email'),
-                    'user_full_name': user_info.get('full_name') or user_info.get('email'),
-                    'forked_at': fork['forked_at'],
-                    'version': fork['version']
-                }
-                fork_list.append(fork_info)
-        
+
+        # Transform in one pass: bind each row's user dict once (only forks
+        # with valid user data are included) instead of re-fetching it per
+        # field
+        fork_list = [
+            {
+                'user_id': user_info['id'],
+                'user_email': user_info['email'],
+                'user_full_name': user_info.get('full_name') or user_info['email'],
+                'forked_at': fork['forked_at'],
+                'version': fork['version']
+            }
+            for fork in forks
+            if (user_info := fork.get('users') or {}).get('id') and user_info.get('email')
+        ]
+
         return {
             'playbook_id': playbook_id,
             'playbook_title': playbook['title'],
             'total_forks': len(fork_list),
             'forks': fork_list
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -809,31 +1028,29 @@ async def update_playbook(
 ):
     """Update a playbook"""
     try:
-        # Check if user owns the playbook
-        playbook = await supabase_service.get_playbook(playbook_id)
-        if not playbook:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Playbook not found"
-            )
-        
-        if playbook["owner_id"] != current_user.user_id:
+        # One round trip: the ownership check rides along in the UPDATE's
+        # WHERE clause instead of a separate get_playbook first
+        update_data = playbook_update.model_dump(exclude_unset=True)
+        updated_playbook = await supabase_service.update_playbook_owned(
+            playbook_id, current_user.user_id, update_data
+        )
+
+        if not updated_playbook:
+            # Nothing matched — disambiguate missing vs not-owned
+            playbook = await supabase_service.get_playbook(playbook_id)
+            if not playbook:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Playbook not found"
+                )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to update this playbook"
             )
-        
-        # Update playbook
-        update_data = playbook_update.dict(exclude_unset=True)
-        updated_playbook = await supabase_service.update_playbook(playbook_id, update_data)
-        
-        if not updated_playbook:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update playbook"
-            )
-        
-        return PlaybookResponse(**convert_vector_embedding(updated_playbook))
+
+        return PlaybookResponse.model_validate(convert_vector_embedding(updated_playbook))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -862,16 +1079,23 @@ async def delete_playbook(
                 detail="Not authorized to delete this playbook"
             )
         
-        # Delete files from storage
-        for file_path in playbook["files"].values():
-            await supabase_service.delete_file_from_storage(file_path)
-        
-        # Delete file vectors from vector database
-        await vector_service.delete_file_vectors(playbook_id)
-        
-        # Delete playbook from database
-        await supabase_service.delete_playbook(playbook_id)
-        
+        # Storage cleanup (one bulk remove call) and the vector delete are
+        # independent — overlap them; neither blocks the row delete on failure
+        cleanup_results = await asyncio.gather(
+            supabase_service.delete_files_from_storage_bulk(
+                list(playbook["files"].values())
+            ),
+            vector_service.delete_file_vectors(playbook_id),
+            return_exceptions=True
+        )
+        for step, result in zip(("storage files", "file vectors"), cleanup_results):
+            if isinstance(result, Exception):
+                print(f"Warning: Failed to delete {step} for {playbook_id}: {result}")
+
+        # Ownership rides along in the DELETE's WHERE clause so a concurrent
+        # transfer can't slip between the check above and the delete
+        await supabase_service.delete_playbook(playbook_id, owner_id=current_user.user_id)
+
         return {"message": "Playbook deleted successfully"}
     except Exception as e:
         raise HTTPException(
@@ -888,39 +1112,46 @@ async def search_playbooks_vector(
 ):
     """Search playbooks using vector similarity"""
     try:
-        print(f"🔍 Starting vector search for query: '{query}'")
-        
+        logger.debug("🔍 Starting vector search for query: '%s'", query)
+
+        # Popular queries repeat — serve recent results without the embedding
+        # call and the match_playbooks round trip. Keyed on the same
+        # normalized form as the query-embedding cache.
+        search_cache_key = (" ".join(query.lower().split()), limit)
+        cached_results = _vector_search_cache.get(search_cache_key)
+        if cached_results is not None:
+            return cached_results
+
         # Create embedding for query
-        print("📊 Creating query embedding...")
         query_embedding = await ai_service.create_embedding(query)
-        print(f"✅ Query embedding created with {len(query_embedding)} dimensions")
-        
+        logger.debug("✅ Query embedding created with %d dimensions", len(query_embedding))
+
         # Search using vector similarity
-        print("🔍 Searching playbooks using vector similarity...")
         results = await supabase_service.search_playbooks_vector(query_embedding, limit)
-        print(f"✅ Found {len(results)} results")
-        
-        # Transform results
-        search_results = []
-        for result in results:
-            try:
-                # Ensure all required fields are present and valid
-                playbook_data = convert_vector_embedding(result["playbook"])
-                playbook_data = ensure_datetime_fields(playbook_data)
-                
-                search_results.append(PlaybookSearchResult(
-                    playbook=PlaybookResponse(**playbook_data),
-                    similarity_score=result["similarity"]
-                ))
-            except Exception as e:
-                print(f"⚠️ Error processing search result: {e}")
-                continue
-        
-        print(f"🎯 Returning {len(search_results)} processed results")
+        logger.debug("✅ Found %d results", len(results))
+        
+        # Transform results in one pass: filter out rows without a playbook
+        # up front so the hot loop is a plain comprehension with no per-item
+        # try/except (convert/ensure already tolerate bad embedding and
+        # timestamp values)
+        search_results = [
+            PlaybookSearchResult(
+                playbook=PlaybookResponse.model_validate(
+                    ensure_datetime_fields(convert_vector_embedding(result["playbook"]))
+                ),
+                similarity_score=result.get("similarity", 0.0)
+            )
+            for result in results
+            if result.get("playbook")
+        ]
+
+
+        logger.debug("🎯 Returning %d processed results", len(search_results))
+        _vector_search_cache.set(search_cache_key, search_results)
         return search_results
-        
+
     except Exception as e:
-        print(f"❌ Vector search failed: {str(e)}")
+        logger.error(f"❌ Vector search failed: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Vector search failed: {str(e)}"
@@ -948,7 +1179,9 @@ async def search_playbooks_text(
             query, parsed_tags, stage, limit, offset
         )
         
-        return [PlaybookResponse(**convert_vector_embedding(playbook)) for playbook in results]
+        return _playbook_list_adapter.validate_python(
+            [convert_vector_embedding(playbook) for playbook in results]
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -960,39 +1193,46 @@ async def search_playbooks_text(
 async def get_playbook_processing_status(playbook_id: str):
     """Get the processing status of a playbook"""
     try:
-        playbook = await supabase_service.get_playbook(playbook_id)
-        if not playbook:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Playbook not found"
-            )
-        
+        # Clients poll this every second or two after upload, so go through
+        # the status RPC that never ships the vector_embedding blob; fall
+        # back to the full row if the RPC isn't deployed yet
+        status_row = await supabase_service.get_playbook_status(playbook_id)
+        if status_row is not None:
+            has_summary = bool(status_row.get("has_summary"))
+            has_embedding = bool(status_row.get("has_embedding"))
+            summary = status_row.get("summary")
+            extracted_tags = status_row.get("tags")
+        else:
+            playbook = await supabase_service.get_playbook(playbook_id)
+            if not playbook:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Playbook not found"
+                )
+            has_summary = bool(playbook.get("summary"))
+            has_embedding = bool(playbook.get("vector_embedding"))
+            summary = playbook.get("summary")
+            extracted_tags = playbook.get("tags")
+
         # Determine status based on AI processing results
-        if playbook.get("summary") and playbook.get("vector_embedding"):
-            status = "completed"
+        if has_summary and has_embedding:
+            processing_state = "completed"
             message = "AI processing completed successfully"
-        elif playbook.get("summary") or playbook.get("vector_embedding"):
-            status = "processing"
+        elif has_summary or has_embedding:
+            processing_state = "processing"
             message = "AI processing in progress"
         else:
-            status = "processing"
+            processing_state = "processing"
             message = "AI processing started"
-        
-        # Convert vector_embedding if it's a string
-        vector_embedding = playbook.get("vector_embedding")
-        if vector_embedding and isinstance(vector_embedding, str):
-            try:
-                vector_embedding = json.loads(vector_embedding)
-            except (json.JSONDecodeError, TypeError):
-                vector_embedding = None
-        
+
         return ProcessingStatus(
-            status=status,
+            status=processing_state,
             message=message,
-            summary=playbook.get("summary"),
-            extracted_tags=playbook.get("tags"),
-            vector_embedding=vector_embedding
+            summary=summary,
+            extracted_tags=extracted_tags
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1038,35 +1278,52 @@ async def get_playbook_files_vector(playbook_id: str):
 async def get_playbook_embedding_status(playbook_id: str):
     """Get the embedding status of a playbook for debugging"""
     try:
-        # Get playbook information
-        playbook = await supabase_service.get_playbook(playbook_id)
-        if not playbook:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Playbook not found"
-            )
-        
-        # Get file vectors
-        file_vectors = await vector_service.get_file_vectors_by_playbook(playbook_id)
-        
-        # Convert vector_embedding if it's a string
-        vector_embedding = playbook.get("vector_embedding")
-        if vector_embedding and isinstance(vector_embedding, str):
-            try:
-                vector_embedding = json.loads(vector_embedding)
-            except (json.JSONDecodeError, TypeError):
-                vector_embedding = None
-        
+        # Presence and dimension come from vector_dims() in SQL — no need to
+        # pull and parse the serialized vector just to call len() on it.
+        # Falls back to the full row if the RPC isn't deployed yet.
+        meta, file_vectors = await asyncio.gather(
+            supabase_service.get_playbook_embedding_meta(playbook_id),
+            vector_service.get_file_vectors_by_playbook(playbook_id)
+        )
+
+        if meta is not None:
+            has_embedding = bool(meta.get("has_embedding"))
+            embedding_dims = meta.get("embedding_dims") or 0
+            summary = meta.get("summary")
+            extracted_tags = meta.get("tags")
+            stage = meta.get("stage")
+        else:
+            playbook = await supabase_service.get_playbook(playbook_id)
+            if not playbook:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Playbook not found"
+                )
+            # Convert vector_embedding if it's a string
+            vector_embedding = playbook.get("vector_embedding")
+            if vector_embedding and isinstance(vector_embedding, str):
+                try:
+                    vector_embedding = orjson.loads(vector_embedding)
+                except (orjson.JSONDecodeError, TypeError):
+                    vector_embedding = None
+            has_embedding = vector_embedding is not None
+            embedding_dims = len(vector_embedding) if vector_embedding else 0
+            summary = playbook.get("summary")
+            extracted_tags = playbook.get("tags")
+            stage = playbook.get("stage")
+
         return {
             "playbook_id": playbook_id,
-            "has_playbook_embedding": vector_embedding is not None,
-            "playbook_embedding_dimensions": len(vector_embedding) if vector_embedding else 0,
+            "has_playbook_embedding": has_embedding,
+            "playbook_embedding_dimensions": embedding_dims,
             "file_vectors_count": len(file_vectors),
-            "summary": playbook.get("summary"),
-            "tags": playbook.get("tags"),
-            "stage": playbook.get("stage"),
-            "ai_processing_complete": bool(playbook.get("summary") and vector_embedding)
+            "summary": summary,
+            "tags": extracted_tags,
+            "stage": stage,
+            "ai_processing_complete": bool(summary and has_embedding)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1104,24 +1361,31 @@ async def reprocess_playbook_ai(
                 detail="No files found for this playbook"
             )
         
-        # Prepare files for AI processing
+        # Download all file contents concurrently — the storage SDK is
+        # synchronous, so each download runs in a thread and total latency is
+        # the slowest file rather than the sum
+        async def download_one(file_data):
+            return await asyncio.to_thread(
+                supabase_service.client.storage.from_(settings.storage_bucket_name).download,
+                file_data["storage_path"]
+            )
+
+        download_results = await asyncio.gather(
+            *[download_one(file_data) for file_data in playbook_files],
+            return_exceptions=True
+        )
+
         files_for_ai = []
-        for file_data in playbook_files:
-            try:
-                # Download file content from storage
-                file_content = supabase_service.client.storage.from_(
-                    settings.storage_bucket_name
-                ).download(file_data["storage_path"])
-                
-                files_for_ai.append({
-                    "filename": file_data["file_name"],
-                    "content": file_content,
-                    "content_type": file_data["file_type"]
-                })
-            except Exception as e:
-                print(f"⚠️ Failed to download {file_data['file_name']}: {e}")
+        for file_data, file_content in zip(playbook_files, download_results):
+            if isinstance(file_content, Exception):
+                logger.warning("⚠️ Failed to download %s: %s", file_data["file_name"], file_content)
                 continue
-        
+            files_for_ai.append({
+                "filename": file_data["file_name"],
+                "content": file_content,
+                "content_type": file_data["file_type"]
+            })
+
         if not files_for_ai:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -1192,17 +1456,15 @@ async def fork_playbook(
                 detail="You cannot fork your own playbook"
             )
         
-        # Step 4: Check if user already forked this playbook
-        existing_forks = await supabase_service.get_user_playbooks(user_id)
-        for fork in existing_forks:
-            if fork['original_playbook_id'] == playbook_id:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="You have already forked this playbook"
-                )
+        # Step 4: Check if user already forked this playbook (single indexed
+        # query instead of fetching the user's entire fork list)
+        if await supabase_service.user_has_fork(user_id, playbook_id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="You have already forked this playbook"
+            )
         
         # Step 5: Get latest version for forking
-        from app.services.version_service import version_service
         latest_version = await version_service.get_latest_version_for_fork(playbook_id)
         
         # Step 6: Create new playbook record in playbooks table
@@ -1249,45 +1511,63 @@ async def fork_playbook(
         # Step 8: Copy files to both new playbook and user_playbook_files with version tracking
         original_files = await version_service.get_version_files(playbook_id, latest_version)
         
+        # The remaining work is independent once original_files is known:
+        # copying into the new playbook, copying into fork tracking, and the
+        # owner notification can all run concurrently instead of serially.
+        fork_copy_task = None
         if original_files:
-            # Copy files to the new playbook record
-            copied_playbook_files = await supabase_service.copy_playbook_files_to_new_playbook(
+            copy_task = asyncio.create_task(supabase_service.copy_playbook_files_to_new_playbook(
                 new_playbook_id=new_playbook['id'],
                 original_files=original_files,
                 user_id=user_id
-            )
-            print(f"✅ Copied {len(copied_playbook_files)} files to new playbook")
-            
-            # Update the new playbook with files information
-            files_dict = {}
-            for file_data in copied_playbook_files:
-                files_dict[file_data['file_name']] = file_data['storage_path']
-            
-            # Update playbook with files information
-            await supabase_service.update_playbook(new_playbook['id'], {
-                "files": files_dict
-            })
-            
+            ))
             # Copy files to user_playbook_files for fork tracking
-            copied_fork_files = await supabase_service.copy_playbook_files_with_version(
+            fork_copy_task = asyncio.create_task(supabase_service.copy_playbook_files_with_version(
                 user_playbook_id=user_playbook['id'],
                 original_files=original_files,
                 version_number=1  # Start with version 1 for fork
-            )
-            print(f"✅ Copied {len(copied_fork_files)} files to fork tracking")
+            ))
         else:
+            copy_task = None
             print("⚠️ No files found to copy to fork")
-        
+
         # Step 9: Create notification for original playbook owner
-        try:
-            await supabase_service.create_fork_notification(
-                original_playbook_id=playbook_id,
-                forking_user_id=user_id,
-                fork_id=user_playbook['id']
-            )
-        except Exception as notification_error:
-            print(f"⚠️ Failed to create fork notification: {notification_error}")
-            # Don't fail the fork if notification fails
+        notify_task = asyncio.create_task(supabase_service.create_fork_notification(
+            original_playbook_id=playbook_id,
+            forking_user_id=user_id,
+            fork_id=user_playbook['id']
+        ))
+
+        update_task = None
+        if copy_task is not None:
+            # The playbook-record update needs the copied storage paths, so it
+            # waits on copy_task but still overlaps the fork-tracking copy and
+            # the notification
+            copied_playbook_files = await copy_task
+            print(f"✅ Copied {len(copied_playbook_files)} files to new playbook")
+
+            files_dict = {}
+            for file_data in copied_playbook_files:
+                files_dict[file_data['file_name']] = file_data['storage_path']
+
+            # Update playbook with files information
+            update_task = asyncio.create_task(supabase_service.update_playbook(new_playbook['id'], {
+                "files": files_dict
+            }))
+
+        pending = [task for task in (update_task, fork_copy_task, notify_task) if task is not None]
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        for task, result in zip(pending, results):
+            if not isinstance(result, Exception):
+                continue
+            if task is notify_task:
+                # Don't fail the fork if notification fails
+                print(f"⚠️ Failed to create fork notification: {result}")
+            else:
+                raise result
+        if fork_copy_task is not None:
+            copied_fork_files = fork_copy_task.result()
+            print(f"✅ Copied {len(copied_fork_files)} files to fork tracking")
         
         # Step 10: Generate playbook URL for redirect (use new playbook ID)
         new_playbook_url = f"/playbooks/{new_playbook['id']}"
@@ -1337,18 +1617,7 @@ async def get_user_playbook_forks(
                 version=up['version'],
                 license=up.get('license'),
                 status=up['status'],
-                original_playbook=PlaybookResponse(
-                    id=original_playbook['id'],
-                    title=original_playbook['title'],
-                    description=original_playbook['description'],
-                    tags=original_playbook.get('tags', []),
-                    stage=original_playbook.get('stage'),
-                    owner_id="",  # Not needed for this context
-                    version=original_playbook['version'],
-                    files={},  # Files will be fetched separately if needed
-                    created_at=original_playbook['created_at'],
-                    updated_at=original_playbook['created_at']  # Use created_at as fallback
-                ) if original_playbook else None
+                original_playbook=_original_playbook_view(original_playbook)
             ))
         
         return response_data
@@ -1388,18 +1657,7 @@ async def get_user_playbook(
             version=user_playbook['version'],
             license=user_playbook.get('license'),
             status=user_playbook['status'],
-            original_playbook=PlaybookResponse(
-                id=original_playbook['id'],
-                title=original_playbook['title'],
-                description=original_playbook['description'],
-                tags=original_playbook.get('tags', []),
-                stage=original_playbook.get('stage'),
-                owner_id="",  # Not needed for this context
-                version=original_playbook['version'],
-                files={},  # Files will be fetched separately if needed
-                created_at=original_playbook['created_at'],
-                updated_at=original_playbook['created_at']  # Use created_at as fallback
-            ) if original_playbook else None
+            original_playbook=_original_playbook_view(original_playbook)
         )
         
     except HTTPException:
@@ -1455,6 +1713,67 @@ async def get_user_playbook_files(
         )
 
 
+@router.get("/user-playbooks/{user_playbook_id}/files/{file_id}/download")
+async def download_user_playbook_file(
+    user_playbook_id: str,
+    file_id: str,
+    current_user: Optional[TokenData] = Depends(get_optional_user)
+):
+    """Stream a single user playbook file without buffering it in memory"""
+    try:
+        # Locate the file within the user playbook
+        files = await supabase_service.get_user_playbook_files(user_playbook_id)
+        file_data = next((f for f in files if f['id'] == file_id), None)
+        if not file_data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found for this user playbook"
+            )
+
+        filename = file_data['file_path'].split('/')[-1] or "download"
+
+        # Proxy the storage object through the pooled client in chunks so
+        # memory stays constant regardless of file size and first bytes reach
+        # the client as soon as storage starts responding
+        client = supabase_service.http_client
+        upstream = await client.send(
+            client.build_request("GET", file_data['storage_path']),
+            stream=True
+        )
+        if upstream.status_code != 200:
+            await upstream.aclose()
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Failed to fetch file from storage"
+            )
+
+        headers = {"Content-Disposition": f"attachment; filename={filename}"}
+        content_length = upstream.headers.get("content-length")
+        if content_length:
+            headers["Content-Length"] = content_length
+
+        async def file_stream():
+            try:
+                async for chunk in upstream.aiter_bytes(_UPLOAD_CHUNK_SIZE):
+                    yield chunk
+            finally:
+                await upstream.aclose()
+
+        return StreamingResponse(
+            file_stream(),
+            media_type=upstream.headers.get("content-type", "application/octet-stream"),
+            headers=headers
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to download file: {str(e)}"
+        )
+
+
 @router.get("/{playbook_id}/download")
 async def download_original_playbook(
     playbook_id: str,
@@ -1486,7 +1805,7 @@ async def download_original_playbook(
         
         # Return ZIP file as streaming response
         return StreamingResponse(
-            iter([zip_buffer.read()]),
+            download_service.stream_zip_buffer(zip_buffer),
             media_type="application/zip",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
@@ -1545,7 +1864,7 @@ async def download_forked_playbook(
         
         # Return ZIP file as streaming response
         return StreamingResponse(
-            iter([zip_buffer.read()]),
+            download_service.stream_zip_buffer(zip_buffer),
             media_type="application/zip",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
@@ -1574,15 +1893,21 @@ async def get_download_info(
                 detail="Source must be 'original' or 'forked'"
             )
         
-        # Get playbook information
-        playbook_info = await download_service.get_playbook_info(playbook_id, source=source)
-        
+        # The playbook info and file metadata only depend on
+        # (playbook_id, source) — fetch them together; the happy path saves a
+        # round trip and a 404 just wastes one cheap extra query. The slim
+        # fetch projects just the listing columns and counts in SQL.
+        playbook_info, (files_metadata, total_files) = await asyncio.gather(
+            download_service.get_playbook_info(playbook_id, source=source),
+            download_service.get_playbook_files_metadata_slim(playbook_id, source)
+        )
+
         if not playbook_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Playbook not found"
             )
-        
+
         # For forked playbooks, check authorization
         if source == "forked" and current_user:
             if playbook_info.get('user_id') != current_user.user_id:
@@ -1590,13 +1915,7 @@ async def get_download_info(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Not authorized to access this playbook"
                 )
-        
-        # Get file metadata
-        files_metadata = await download_service.get_playbook_files_metadata(playbook_id, source)
-        
-        # Calculate total size (estimate)
-        total_files = len(files_metadata)
-        
+
         # Get playbook title
         if source == "original":
             playbook_title = playbook_info.get('title', 'Unknown_Playbook')
@@ -1647,47 +1966,23 @@ async def upload_playbook_file(
 ):
     """Upload a file to a playbook and create the database entry"""
     try:
-        # Verify playbook exists
-        playbook = await supabase_service.get_playbook(playbook_id)
+        # The existence check and reading the request body are independent —
+        # overlap them instead of paying for each in sequence. The chunked
+        # helper enforces the size cap as bytes arrive rather than after
+        # buffering everything.
+        playbook, (file_content, _, _) = await asyncio.gather(
+            supabase_service.get_playbook(playbook_id),
+            _read_upload_within_limit(file, 0)
+        )
         if not playbook:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Playbook not found"
             )
-        
-        # Read file content
-        file_content = await file.read()
-        
+
         # Determine file type from extension, mapping to allowed database types
-        file_extension = file.filename.split('.')[-1].lower() if '.' in file.filename else 'txt'
-        
-        # Database constraint only allows: 'md', 'pdf', 'csv', 'docx', 'txt'
-        # Map other common types to txt
-        type_mapping = {
-            'md': 'md',
-            'markdown': 'md',
-            'pdf': 'pdf',
-            'csv': 'csv',
-            'docx': 'docx',
-            'doc': 'docx',  # Map doc to docx
-            'txt': 'txt',
-            'py': 'txt',    # Map Python files to txt
-            'python': 'txt',
-            'json': 'txt',  # Map JSON to txt
-            'yaml': 'txt',  # Map YAML to txt
-            'yml': 'txt',
-            'js': 'txt',    # Map JavaScript to txt
-            'html': 'txt',  # Map HTML to txt
-            'xml': 'txt',   # Map XML to txt
-            'sql': 'txt',   # Map SQL to txt
-            'sh': 'txt',    # Map shell scripts to txt
-            'cfg': 'txt',   # Map config files to txt
-            'conf': 'txt',
-            'ini': 'txt',
-            'log': 'txt'
-        }
-        
-        file_type = type_mapping.get(file_extension, 'txt')  # Default fallback to txt
+        file_extension = file.filename.rpartition('.')[2].lower() if '.' in file.filename else 'txt'
+        file_type = _FILE_TYPE_MAP.get(file_extension, 'txt')  # Default fallback to txt
         
         # Generate storage path with new structure: playbook/{{user_id}}/version/filename
         if file_path:
@@ -1708,8 +2003,7 @@ async def upload_playbook_file(
         
         # Parse tags
         try:
-            import json
-            tags_list = json.loads(tags) if tags else []
+            tags_list = orjson.loads(tags) if tags else []
         except:
             tags_list = []
         
@@ -1770,7 +2064,7 @@ async def create_playbook_file_metadata(
             )
         
         # Ensure the playbook_id in the request matches the URL parameter
-        file_dict = file_data.dict()
+        file_dict = file_data.model_dump()
         file_dict["playbook_id"] = playbook_id
         
         # Set uploaded_by to current user if authenticated
@@ -1861,41 +2155,64 @@ async def get_playbook_file(
         )
 
 
-@router.put("/{playbook_id}/files/{file_id}", response_model=PlaybookFileResponse)
-async def update_playbook_file(
-    playbook_id: str,
-    file_id: str,
-    file_update: PlaybookFileUpdate,
-    current_user: TokenData = Depends(get_authenticated_user)
-):
-    """Update a playbook file entry"""
-    try:
-        # Get the existing file
-        existing_file = await supabase_service.get_playbook_file(file_id)
-        
-        if not existing_file:
+async def _authorize_file_mutation(playbook_id: str, file_id: str, user_id: str, action: str) -> None:
+    """Validate existence, playbook membership and ownership for a file write.
+
+    Prefers the check_file_owner RPC — one round trip instead of the
+    file-then-playbook lookup pair — and falls back to the two-query path
+    until the SQL function is deployed.
+    """
+    check = await supabase_service.check_file_owner(file_id, playbook_id)
+    if check is not None:
+        if not check.get("file_exists"):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Playbook file not found"
             )
-        
-        # Verify the file belongs to the specified playbook
-        if existing_file["playbook_id"] != playbook_id:
+        if not check.get("belongs"):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="File does not belong to specified playbook"
             )
-        
-        # Get the playbook to check ownership
-        playbook = await supabase_service.get_playbook(playbook_id)
-        if playbook["owner_id"] != current_user.user_id:
+        if check.get("owner_id") != user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to update this playbook file"
+                detail=f"Not authorized to {action} this playbook file"
             )
-        
+        return
+
+    existing_file = await supabase_service.get_playbook_file(file_id)
+    if not existing_file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Playbook file not found"
+        )
+    if existing_file["playbook_id"] != playbook_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File does not belong to specified playbook"
+        )
+    playbook = await supabase_service.get_playbook(playbook_id)
+    if playbook["owner_id"] != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Not authorized to {action} this playbook file"
+        )
+
+
+@router.put("/{playbook_id}/files/{file_id}", response_model=PlaybookFileResponse)
+async def update_playbook_file(
+    playbook_id: str,
+    file_id: str,
+    file_update: PlaybookFileUpdate,
+    current_user: TokenData = Depends(get_authenticated_user)
+):
+    """Update a playbook file entry"""
+    try:
+        await _authorize_file_mutation(playbook_id, file_id, current_user.user_id, "update")
+
         # Update the file
-        update_data = file_update.dict(exclude_unset=True)
+        update_data = file_update.model_dump(exclude_unset=True)
         updated_file = await supabase_service.update_playbook_file(file_id, update_data)
         
         if not updated_file:
@@ -1923,30 +2240,8 @@ async def delete_playbook_file(
 ):
     """Delete a playbook file entry"""
     try:
-        # Get the existing file
-        existing_file = await supabase_service.get_playbook_file(file_id)
-        
-        if not existing_file:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Playbook file not found"
-            )
-        
-        # Verify the file belongs to the specified playbook
-        if existing_file["playbook_id"] != playbook_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="File does not belong to specified playbook"
-            )
-        
-        # Get the playbook to check ownership
-        playbook = await supabase_service.get_playbook(playbook_id)
-        if playbook["owner_id"] != current_user.user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to delete this playbook file"
-            )
-        
+        await _authorize_file_mutation(playbook_id, file_id, current_user.user_id, "delete")
+
         # Delete the file entry
         await supabase_service.delete_playbook_file(file_id)
         
@@ -1968,34 +2263,31 @@ async def get_playbook_fork_info(
 ):
     """Get fork information for a specific playbook"""
     try:
-        # Verify playbook exists
-        playbook = await supabase_service.get_playbook(playbook_id)
+        # All four reads are independent: run them together instead of four
+        # sequential round trips, and resolve the user's own fork with one
+        # indexed query rather than scanning their whole fork list in Python
+        playbook, fork_count, recent_forks, user_fork_row = await asyncio.gather(
+            supabase_service.get_playbook(playbook_id),
+            supabase_service.get_playbook_fork_count(playbook_id),
+            supabase_service.get_playbook_forks(playbook_id, limit=5),
+            supabase_service.get_user_fork_for_playbook(current_user.user_id, playbook_id)
+            if current_user else asyncio.sleep(0, result=None)
+        )
         if not playbook:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Playbook not found"
             )
-        
-        # Get fork count
-        fork_count = await supabase_service.get_playbook_fork_count(playbook_id)
-        
-        # Get recent forks (last 5)
-        recent_forks = await supabase_service.get_playbook_forks(playbook_id, limit=5)
-        
-        # Check if current user has forked this playbook
+
         user_fork_info = None
-        if current_user:
-            user_forks = await supabase_service.get_user_playbooks(current_user.user_id)
-            for fork in user_forks:
-                if fork['original_playbook_id'] == playbook_id:
-                    user_fork_info = {
-                        'fork_id': fork['id'],
-                        'forked_at': fork['forked_at'],
-                        'version': fork['version'],
-                        'status': fork['status']
-                    }
-                    break
-        
+        if user_fork_row:
+            user_fork_info = {
+                'fork_id': user_fork_row['id'],
+                'forked_at': user_fork_row['forked_at'],
+                'version': user_fork_row['version'],
+                'status': user_fork_row['status']
+            }
+
         # Check if user can fork this playbook
         can_fork = True
         if current_user:
@@ -2015,6 +2307,8 @@ async def get_playbook_fork_info(
             'can_fork': can_fork,
             'is_owner': current_user and playbook['owner_id'] == current_user.user_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -2053,7 +2347,6 @@ async def sync_fork_with_original(
             )
         
         # Get current versions
-        from app.services.version_service import version_service
         original_latest_version = await version_service.get_current_version(original_playbook['id'])
         fork_current_version = user_playbook.get('base_version', 1)
         
@@ -2136,7 +2429,6 @@ async def get_fork_sync_status(
             )
         
         # Get current versions
-        from app.services.version_service import version_service
         original_latest_version = await version_service.get_current_version(original_playbook['id'])
         fork_current_version = user_playbook.get('base_version', 1)
         
@@ -2186,23 +2478,33 @@ async def delete_fork(
                 detail="Not authorized to delete this fork"
             )
         
-        # Delete all files from storage
+        # Delete all files from storage concurrently; the semaphore keeps a
+        # big fork from exhausting the HTTP connection pool
         user_playbook_files = await supabase_service.get_user_playbook_files(user_playbook_id)
-        for file_data in user_playbook_files:
-            try:
+        delete_semaphore = asyncio.Semaphore(10)
+        # One split on the bucket separator replaces the part-by-part scan of
+        # the URL that ran for every file
+        bucket_sep = f"/{settings.storage_bucket_name}/"
+
+        async def _delete_one(file_data):
+            async with delete_semaphore:
                 # Extract file path from storage URL
                 storage_path = file_data['storage_path']
                 if storage_path.startswith('http'):
-                    path_parts = storage_path.split('/')
-                    bucket_index = next(i for i, part in enumerate(path_parts) if part == settings.storage_bucket_name)
-                    file_path = '/'.join(path_parts[bucket_index + 1:])
+                    file_path = storage_path.split(bucket_sep, 1)[1]
                 else:
                     file_path = storage_path
-                
+
                 # Delete from storage
                 await supabase_service.delete_file_from_storage(file_path)
-            except Exception as file_error:
-                print(f"Warning: Failed to delete file {file_data.get('file_path')}: {file_error}")
+
+        delete_results = await asyncio.gather(
+            *[_delete_one(f) for f in user_playbook_files],
+            return_exceptions=True
+        )
+        for file_data, result in zip(user_playbook_files, delete_results):
+            if isinstance(result, Exception):
+                print(f"Warning: Failed to delete file {file_data.get('file_path')}: {result}")
         
         # Delete user playbook files from database
         await supabase_service.delete_user_playbook_files(user_playbook_id)
@@ -2248,22 +2550,16 @@ async def upload_fork_file(
                 detail="Not authorized to upload files to this fork"
             )
         
-        # Read file content
-        file_content = await file.read()
-        
+        # Read file content in chunks, rejecting oversized uploads as bytes
+        # arrive instead of after buffering the whole body
+        file_content, _, _ = await _read_upload_within_limit(file, 0)
+
         # Determine file type from extension
-        file_extension = file.filename.split('.')[-1].lower() if '.' in file.filename else 'txt'
-        file_type = file_extension if file_extension in ['md', 'pdf', 'csv', 'docx', 'txt'] else 'txt'
-        
+        file_extension = file.filename.rpartition('.')[2].lower() if '.' in file.filename else 'txt'
+        file_type = file_extension if file_extension in _ALLOWED_DB_FILE_TYPES else 'txt'
+
         # Determine content type
-        content_type_map = {
-            'pdf': 'application/pdf',
-            'md': 'text/markdown',
-            'txt': 'text/plain',
-            'csv': 'text/csv',
-            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        }
-        content_type = content_type_map.get(file_extension, 'application/octet-stream')
+        content_type = _CONTENT_TYPE_MAP.get(file_extension, 'application/octet-stream')
         
         # Generate storage path
         if file_path:
@@ -2288,38 +2584,18 @@ async def upload_fork_file(
             "is_active": True
         }
         
-        # Try to add timestamp fields if they exist
-        try:
-            file_data.update({
-                "uploaded_at": datetime.utcnow().isoformat(),
-                "last_modified_at": datetime.utcnow().isoformat()
-            })
-            
-            response = supabase_service.client.table("user_playbook_files").insert(file_data).execute()
-            if not response.data:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to create file entry"
-                )
-                
-        except Exception as timestamp_error:
-            # If timestamp columns don't exist, try without them
-            print(f"Timestamp columns not available, trying without: {str(timestamp_error)}")
-            
-            # Remove timestamp fields and try again
-            file_data.pop("uploaded_at", None)
-            file_data.pop("last_modified_at", None)
-            
-            response = supabase_service.client.table("user_playbook_files").insert(file_data).execute()
-            if not response.data:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to create file entry"
-                )
-        
+        # The service remembers whether the optional timestamp columns exist,
+        # so only the very first insert in the process pays the probe
+        created_rows = await supabase_service.insert_user_playbook_files([file_data])
+        if not created_rows:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create file entry"
+            )
+
         return {
             "message": "File uploaded successfully",
-            "file_id": response.data[0]['id'],
+            "file_id": created_rows[0]['id'],
             "file_name": file_name,
             "file_type": file_type,
             "storage_url": storage_url
@@ -63,4 +63,8 @@ class Settings(BaseSettings):
 
 
 # Global settings instance
-settings = Settings() 
+settings = Settings()
+
+# Frozen once at import so per-file membership checks on the upload path are
+# O(1) set lookups instead of list scans
+ALLOWED_FILE_TYPES = frozenset(settings.allowed_file_types) 
@@ -1,15 +1,41 @@
 from fastapi import FastAPI, HTTPException, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
 import logging
+import logging.handlers
+import queue
 from pathlib import Path
 from scripts.setup_database import setup_database
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Listener that drains the log queue on a background thread (started in lifespan)
+_log_listener = None
+
+
+def _setup_queue_logging():
+    """Route log records through a queue so handlers never block the event loop.
+
+    Emitting a record becomes a queue put; the actual stream writes happen on
+    the listener's background thread instead of inside request handlers.
+    """
+    global _log_listener
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    if not handlers or any(isinstance(h, logging.handlers.QueueHandler) for h in handlers):
+        return
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _log_listener.start()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -19,6 +45,8 @@ async def lifespan(app: FastAPI):
         from pathlib import Path
         import asyncio
 
+        _setup_queue_logging()
+
         setup_database_script = Path(__file__).parent.parent / "scripts" / "setup_database.py"
 
         if setup_database_script.exists():
@@ -31,6 +59,17 @@ async def lifespan(app: FastAPI):
         else:
             logger.warning(f"⚠️ Setup script not found at {setup_database_script}. Skipping database setup.")
 
+        # Initialize the shared Supabase/HTTP clients up front so the first
+        # request reuses pooled keep-alive connections instead of paying
+        # client construction + TLS handshake cost
+        from app.services.supabase_service import supabase_service
+        supabase_service.warm_up()
+
+        # Buffered view recording: one flusher task aggregates view events
+        # instead of a DB write per GET
+        from app.services import view_buffer
+        view_buffer.start()
+
         logger.info("🚀 Starting Playbook API...")
         yield
     except Exception as e:
@@ -38,7 +77,13 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         # Shutdown
+        from app.services import view_buffer
+        from app.services.supabase_service import supabase_service
+        await view_buffer.stop()
+        await supabase_service.close()
         logger.info("👋 Shutting down Playbook API...")
+        if _log_listener is not None:
+            _log_listener.stop()
 
 
 # Create FastAPI app
@@ -46,7 +91,10 @@ app = FastAPI(
     title="Playbook API",
     description="A GitHub-like repository system for managing playbooks with AI-powered content analysis",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson serializes the large playbook/search payloads (including
+    # embedding arrays) several times faster than stdlib json
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
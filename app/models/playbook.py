@@ -12,7 +12,7 @@ class PlaybookCreate(BaseModel):
     version: str = Field(default="v1", max_length=20)
 
 
-import json
+import orjson
 from typing import Union
 
 class PlaybookResponse(BaseModel):
@@ -41,8 +41,8 @@ class PlaybookResponse(BaseModel):
         if 'vector_embedding' in data and data['vector_embedding'] is not None:
             if isinstance(data['vector_embedding'], str):
                 try:
-                    data['vector_embedding'] = json.loads(data['vector_embedding'])
-                except (json.JSONDecodeError, TypeError):
+                    data['vector_embedding'] = orjson.loads(data['vector_embedding'])
+                except (orjson.JSONDecodeError, TypeError):
                     data['vector_embedding'] = None
         
         return cls(**data)
@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+
+# Bump when the prompts in ai_service change so stale payloads stop matching
+_PROMPT_VERSION = "1"
+
+# The cached payload must carry these keys to be served; anything else is a
+# stale schema from an older prompt/code version and gets ignored
+_REQUIRED_KEYS = ("summary", "tags", "stage")
+
+
+def build_ai_results_key(
+    title: str,
+    description: str,
+    blog_content: Optional[str],
+    file_hashes: List[str]
+) -> str:
+    """Build a content-addressed key for the summarize/tag/stage results.
+
+    Each input is length-prefixed before hashing so adjacent fields can't
+    collide by concatenation, and the model id + prompt version are folded in
+    so cached results die with the configuration that produced them.
+    """
+    hasher = hashlib.sha256()
+    for part in (settings.gemini_model, _PROMPT_VERSION, title, description,
+                 blog_content or "", *sorted(file_hashes)):
+        encoded = part.encode("utf-8")
+        hasher.update(len(encoded).to_bytes(8, "big"))
+        hasher.update(encoded)
+    return hasher.hexdigest()
+
+
+async def get_ai_results(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Look up cached AI results by content key; None on miss or any error"""
+    # Imported here to avoid a circular import with supabase_service
+    from app.services.supabase_service import supabase_service
+    try:
+        response = await asyncio.to_thread(
+            supabase_service.client.table("ai_results_cache").select(
+                "payload"
+            ).eq("cache_key", cache_key).execute
+        )
+        if not response.data:
+            return None
+        payload = response.data[0].get("payload")
+        if not isinstance(payload, dict) or not all(k in payload for k in _REQUIRED_KEYS):
+            return None
+        return payload
+    except Exception as e:
+        print(f"⚠️ AI results cache lookup failed: {str(e)}")
+        return None
+
+
+async def put_ai_results(cache_key: str, payload: Dict[str, Any]) -> None:
+    """Store AI results under their content key (best-effort)"""
+    from app.services.supabase_service import supabase_service
+    try:
+        await asyncio.to_thread(
+            supabase_service.client.table("ai_results_cache").upsert({
+                "cache_key": cache_key,
+                "payload": payload
+            }).execute
+        )
+    except Exception as e:
+        print(f"⚠️ Failed to cache AI results: {str(e)}")
@@ -4,7 +4,7 @@ import asyncio
 import aiofiles
 import PyPDF2
 import pandas as pd
-import json
+import orjson
 import markdown
 from io import BytesIO
 import zipfile
@@ -12,6 +12,121 @@ import os
 import numpy as np
 import time
 from app.config import settings
+from app.utils.cache import TTLCache
+import concurrent.futures
+
+
+# Max contents per batched embed_content request
+_EMBED_BATCH_LIMIT = 100
+
+# Process pool for CPU-bound text extraction. PDF/spreadsheet parsing holds
+# the GIL, so a thread pool would still serialize concurrent uploads on one
+# worker; separate processes let extraction scale with core count. Created
+# lazily so importing the service never forks workers.
+_extract_pool = None
+
+
+def _get_extract_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _extract_pool
+    if _extract_pool is None:
+        _extract_pool = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _extract_pool
+
+
+def _extract_pdf_text(file_content: bytes) -> str:
+    """Extract text from PDF file (optimized for speed)"""
+    try:
+        pdf_reader = PyPDF2.PdfReader(BytesIO(file_content))
+        text = ""
+
+        # Limit to first 5 pages for faster processing
+        max_pages = min(5, len(pdf_reader.pages))
+
+        for i in range(max_pages):
+            page_text = pdf_reader.pages[i].extract_text()
+            text += page_text + "\n"
+
+            # Limit total text length for faster AI processing
+            if len(text) > 3000:
+                text = text[:3000] + "..."
+                break
+
+        return text
+    except Exception as e:
+        return f"Error extracting PDF text: {str(e)}"
+
+
+def _extract_spreadsheet_text(file_content: bytes, content_type: str) -> str:
+    """Extract text from spreadsheet files (optimized for speed)"""
+    try:
+        if content_type == "text/csv":
+            df = pd.read_csv(BytesIO(file_content))
+        else:
+            df = pd.read_excel(BytesIO(file_content))
+
+        # Limit rows and columns for faster processing
+        if len(df) > 50:
+            df = df.head(50)  # First 50 rows
+        if len(df.columns) > 10:
+            df = df.iloc[:, :10]  # First 10 columns
+
+        # Convert to string representation with limited output
+        text = df.to_string(max_rows=20, max_cols=5)
+
+        # Limit total length
+        if len(text) > 2000:
+            text = text[:2000] + "..."
+
+        return text
+    except Exception as e:
+        return f"Error extracting spreadsheet text: {str(e)}"
+
+
+def _extract_json_text(file_content: bytes) -> str:
+    """Extract text from JSON file"""
+    try:
+        data = orjson.loads(file_content)
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
+    except Exception as e:
+        return f"Error extracting JSON text: {str(e)}"
+
+
+def _extract_zip_text(file_content: bytes) -> str:
+    """Extract text from ZIP file"""
+    try:
+        text_content = ""
+        with zipfile.ZipFile(BytesIO(file_content), 'r') as zip_file:
+            for file_info in zip_file.filelist:
+                if not file_info.is_dir():
+                    filename = file_info.filename
+                    if filename.endswith(('.txt', '.md', '.csv', '.json')):
+                        with zip_file.open(filename) as file:
+                            content = file.read()
+                            try:
+                                text_content += f"\n--- {filename} ---\n"
+                                text_content += content.decode('utf-8')
+                            except:
+                                text_content += f"\n--- {filename} (binary) ---\n"
+        return text_content
+    except Exception as e:
+        return f"Error extracting ZIP text: {str(e)}"
+
+
+def _extract_text_sync(file_content: bytes, filename: str, content_type: str) -> str:
+    """Dispatch CPU-bound extraction by content type (runs in a pool worker)"""
+    if content_type == "application/pdf":
+        return _extract_pdf_text(file_content)
+    elif content_type in ["text/csv", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "application/vnd.ms-excel"]:
+        return _extract_spreadsheet_text(file_content, content_type)
+    elif content_type in ["application/json"]:
+        return _extract_json_text(file_content)
+    elif content_type in ["application/zip", "application/x-zip-compressed"]:
+        return _extract_zip_text(file_content)
+    else:
+        try:
+            return file_content.decode('utf-8')
+        except:
+            return f"Binary file: {filename}"
 
 
 class AIService:
@@ -19,6 +134,9 @@ class AIService:
         self._model = None
         self._embedding_model = None
         self._configured = False
+        # Repeated search queries (trending terms) reuse their embedding
+        # instead of paying another API round-trip per request
+        self._query_embedding_cache = TTLCache(maxsize=2048, ttl=3600.0)
     
     def _configure(self):
         """Lazy configuration of Gemini models"""
@@ -46,100 +164,23 @@ class AIService:
     async def extract_text_from_file(self, file_content: bytes, filename: str, content_type: str) -> str:
         """Extract text content from various file types"""
         try:
-            if content_type == "application/pdf":
-                return await self._extract_text_from_pdf(file_content)
-            elif content_type in ["text/plain", "text/markdown"]:
+            if content_type in ["text/plain", "text/markdown"]:
+                # Plain decode is cheap enough to do inline
                 return file_content.decode('utf-8')
-            elif content_type in ["text/csv", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "application/vnd.ms-excel"]:
-                return await self._extract_text_from_spreadsheet(file_content, content_type)
-            elif content_type in ["application/json"]:
-                return await self._extract_text_from_json(file_content)
-            elif content_type in ["application/zip", "application/x-zip-compressed"]:
-                return await self._extract_text_from_zip(file_content)
-            else:
-                # Try to decode as text
-                try:
-                    return file_content.decode('utf-8')
-                except:
-                    return f"Binary file: {filename}"
+
+            # Parsing PDFs/spreadsheets/archives is CPU-bound; run it in the
+            # process pool so concurrent uploads use multiple cores
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                _get_extract_pool(),
+                _extract_text_sync,
+                file_content,
+                filename,
+                content_type
+            )
         except Exception as e:
             return f"Error extracting text from {filename}: {str(e)}"
-    
-    async def _extract_text_from_pdf(self, file_content: bytes) -> str:
-        """Extract text from PDF file (optimized for speed)"""
-        try:
-            pdf_reader = PyPDF2.PdfReader(BytesIO(file_content))
-            text = ""
-            
-            # Limit to first 5 pages for faster processing
-            max_pages = min(5, len(pdf_reader.pages))
-            
-            for i in range(max_pages):
-                page_text = pdf_reader.pages[i].extract_text()
-                text += page_text + "\n"
-                
-                # Limit total text length for faster AI processing
-                if len(text) > 3000:
-                    text = text[:3000] + "..."
-                    break
-            
-            return text
-        except Exception as e:
-            return f"Error extracting PDF text: {str(e)}"
-    
-    async def _extract_text_from_spreadsheet(self, file_content: bytes, content_type: str) -> str:
-        """Extract text from spreadsheet files (optimized for speed)"""
-        try:
-            if content_type == "text/csv":
-                df = pd.read_csv(BytesIO(file_content))
-            else:
-                df = pd.read_excel(BytesIO(file_content))
-            
-            # Limit rows and columns for faster processing
-            if len(df) > 50:
-                df = df.head(50)  # First 50 rows
-            if len(df.columns) > 10:
-                df = df.iloc[:, :10]  # First 10 columns
-            
-            # Convert to string representation with limited output
-            text = df.to_string(max_rows=20, max_cols=5)
-            
-            # Limit total length
-            if len(text) > 2000:
-                text = text[:2000] + "..."
-            
-            return text
-        except Exception as e:
-            return f"Error extracting spreadsheet text: {str(e)}"
-    
-    async def _extract_text_from_json(self, file_content: bytes) -> str:
-        """Extract text from JSON file"""
-        try:
-            data = json.loads(file_content.decode('utf-8'))
-            return json.dumps(data, indent=2)
-        except Exception as e:
-            return f"Error extracting JSON text: {str(e)}"
-    
-    async def _extract_text_from_zip(self, file_content: bytes) -> str:
-        """Extract text from ZIP file"""
-        try:
-            text_content = ""
-            with zipfile.ZipFile(BytesIO(file_content), 'r') as zip_file:
-                for file_info in zip_file.filelist:
-                    if not file_info.is_dir():
-                        filename = file_info.filename
-                        if filename.endswith(('.txt', '.md', '.csv', '.json')):
-                            with zip_file.open(filename) as file:
-                                content = file.read()
-                                try:
-                                    text_content += f"\n--- {filename} ---\n"
-                                    text_content += content.decode('utf-8')
-                                except:
-                                    text_content += f"\n--- {filename} (binary) ---\n"
-            return text_content
-        except Exception as e:
-            return f"Error extracting ZIP text: {str(e)}"
-    
+
     async def generate_summary_optimized(self, content: str, title: str) -> str:
         """Generate a summary using optimized, minimal content"""
         try:
@@ -267,7 +308,7 @@ JSON response:
                 
                 if json_start != -1 and json_end > json_start:
                     json_str = response_text[json_start:json_end]
-                    result = json.loads(json_str)
+                    result = orjson.loads(json_str)
                 else:
                     # Fallback parsing if JSON structure is not found
                     raise ValueError("No JSON structure found in response")
@@ -295,7 +336,7 @@ JSON response:
                     "stage": stage
                 }
                 
-            except (json.JSONDecodeError, ValueError) as e:
+            except (orjson.JSONDecodeError, ValueError) as e:
                 print(f"⚠️ JSON parsing failed: {e}")
                 # Fallback to default values
                 return {
@@ -397,7 +438,10 @@ JSON response:
             norm = np.linalg.norm(embedding_array)
             if norm > 0:
                 normalized = embedding_array / norm
-                return normalized.tolist()
+                # Round to 6 decimals: unit-norm components carry no useful
+                # precision beyond that, and it shrinks the JSON wire format
+                # of each 768-dim vector substantially
+                return np.round(normalized, 6).tolist()
             return embedding
         except Exception as e:
             print(f"Error normalizing embedding: {str(e)}")
@@ -406,41 +450,95 @@ JSON response:
     async def create_embedding(self, text: str) -> List[float]:
         """Create vector embedding for text using Gemini"""
         try:
+            # Normalize on whitespace and case so trivially reworded repeats
+            # of the same query share a cache entry
+            cache_key = " ".join(text.lower().split())
+            cached_embedding = self._query_embedding_cache.get(cache_key)
+            if cached_embedding is not None:
+                return cached_embedding
+
             # Combine title, description, and content for embedding
             combined_text = text[:8000]  # Limit to avoid token limits
-            
-            # Use Gemini's embedding model with the correct method
-            embedding_result = genai.embed_content(
+
+            # Use Gemini's embedding model with the correct method (in a
+            # thread: the SDK call is synchronous)
+            embedding_result = await asyncio.to_thread(
+                genai.embed_content,
                 model=self.embedding_model,
                 content=combined_text
             )
-            
+
             # Convert to list of floats and normalize
             embedding_vector = embedding_result['embedding']
-            
+
             # Normalize the embedding for better similarity calculations
             normalized_embedding = self._normalize_embedding(embedding_vector)
-            
+
+            self._query_embedding_cache.set(cache_key, normalized_embedding)
             return normalized_embedding
         except Exception as e:
             print(f"Error creating embedding: {str(e)}")
             # Return zero vector as fallback
             return [0.0] * 768  # Gemini embedding dimension
-    
+
+    async def create_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """Create embeddings for several texts in a single API call.
+
+        One batched request amortizes the per-call overhead that N separate
+        embed calls would pay; results come back in input order.
+        """
+        try:
+            if not texts:
+                return []
+
+            truncated_texts = [text[:8000] for text in texts]
+
+            # The API caps how many contents fit in one request; oversized
+            # batches split into sub-batches that run concurrently and are
+            # stitched back together in input order
+            sub_batches = [
+                truncated_texts[i:i + _EMBED_BATCH_LIMIT]
+                for i in range(0, len(truncated_texts), _EMBED_BATCH_LIMIT)
+            ]
+
+            results = await asyncio.gather(*[
+                asyncio.to_thread(
+                    genai.embed_content,
+                    model=self.embedding_model,
+                    content=sub_batch
+                )
+                for sub_batch in sub_batches
+            ])
+
+            embeddings = []
+            for result in results:
+                embeddings.extend(result['embedding'])
+
+            return [self._normalize_embedding(vector) for vector in embeddings]
+        except Exception as e:
+            print(f"Error creating batch embeddings: {str(e)}")
+            # Return zero vectors as fallback
+            return [[0.0] * 768 for _ in texts]  # Gemini embedding dimension
+
     async def process_playbook_files(self, files: List[Dict[str, Any]], title: str, description: str, blog_content: Optional[str] = None) -> Dict[str, Any]:
         """Process all files in a playbook and generate AI insights (synchronous for summary, tags, stage)"""
         try:
-            # Extract text from all files (for background embedding only)
+            # Collect text from all files (for background embedding only),
+            # reusing pre-extracted text when the caller already has it so the
+            # expensive parsers run once per file per upload
             text_start_time = time.time()
             all_text = ""
             for file_info in files:
-                file_start = time.time()
-                text_content = await self.extract_text_from_file(
-                    file_info['content'],
-                    file_info['filename'],
-                    file_info['content_type']
-                )
-                print(f"📄 Extracted text from {file_info['filename']} in {time.time() - file_start:.2f}s ({len(text_content)} chars)")
+                if file_info.get('text') is not None:
+                    text_content = file_info['text']
+                else:
+                    file_start = time.time()
+                    text_content = await self.extract_text_from_file(
+                        file_info['content'],
+                        file_info['filename'],
+                        file_info['content_type']
+                    )
+                    print(f"📄 Extracted text from {file_info['filename']} in {time.time() - file_start:.2f}s ({len(text_content)} chars)")
                 all_text += f"\n\n--- {file_info['filename']} ---\n{text_content}"
             
             print(f"📚 Total text extraction completed in {time.time() - text_start_time:.2f}s")
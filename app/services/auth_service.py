@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 from app.config import settings
 from app.services.supabase_service import supabase_service
@@ -12,6 +12,9 @@ class AuthService:
         self.secret_key = settings.secret_key
         self.algorithm = settings.algorithm
         self.access_token_expire_minutes = settings.access_token_expire_minutes
+        # Build the key object once — jose otherwise reconstructs it from the
+        # raw secret on every encode/decode call
+        self._signing_key = jwk.construct(settings.secret_key, settings.algorithm)
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a password against its hash"""
@@ -30,13 +33,13 @@ class AuthService:
             expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes)
         
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        encoded_jwt = jwt.encode(to_encode, self._signing_key, algorithm=self.algorithm)
         return encoded_jwt
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify JWT token and return payload"""
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = jwt.decode(token, self._signing_key, algorithms=[self.algorithm])
             return payload
         except JWTError:
             return None
@@ -60,6 +63,18 @@ class AuthService:
             print(f"Authentication error: {str(e)}")
             return None
     
+    async def register_user_if_absent(self, email: str, password: str, full_name: str) -> Optional[Dict[str, Any]]:
+        """Register a new user unless the email is already taken.
+
+        Returns None when a user with this email already exists, so callers
+        don't need a separate existence lookup first.
+        """
+        try:
+            hashed_password = self.get_password_hash(password)
+            return await supabase_service.register_user_if_absent(email, full_name, hashed_password)
+        except Exception as e:
+            raise Exception(f"Failed to register user: {str(e)}")
+
     async def register_user(self, email: str, password: str, full_name: str) -> Optional[Dict[str, Any]]:
         """Register a new user"""
         try:
@@ -89,8 +104,14 @@ class AuthService:
         user_id: str = payload.get("sub")
         if user_id is None:
             return None
-        
-        return {"id": user_id, "email": payload.get("email")}
+
+        return {
+            "id": user_id,
+            "email": payload.get("email"),
+            "full_name": payload.get("full_name"),
+            "created_at": payload.get("created_at"),
+            "exp": payload.get("exp")
+        }
 
 
 # Global instance
@@ -1,3 +1,4 @@
+import asyncio
 import zipfile
 import tempfile
 import os
@@ -39,6 +40,24 @@ class DownloadService:
         except Exception as e:
             raise Exception(f"Failed to get playbook files metadata: {str(e)}")
     
+    async def get_playbook_files_metadata_slim(self, playbook_id: str, source: str = "original") -> tuple:
+        """
+        Get the projected listing rows plus an exact count for download info
+
+        Unlike get_playbook_files_metadata this never pulls full rows — only
+        the name/type/path columns cross the wire and the count comes from
+        the database, so the info endpoint stays cheap for large playbooks.
+        """
+        try:
+            if source == "original":
+                return await supabase_service.get_playbook_files_slim(playbook_id)
+            elif source == "forked":
+                return await supabase_service.get_user_playbook_files_slim(playbook_id)
+            else:
+                raise ValueError(f"Invalid source: {source}. Must be 'original' or 'forked'")
+        except Exception as e:
+            raise Exception(f"Failed to get playbook files metadata: {str(e)}")
+
     async def download_file_from_storage(self, storage_path: str, source: str = "original") -> bytes:
         """
         Download a file from Supabase Storage
@@ -78,8 +97,20 @@ class DownloadService:
             else:
                 file_path = storage_path
             
-            # Download file from Supabase Storage
-            file_content = supabase_service.client.storage.from_(bucket_name).download(file_path)
+            # Public URLs go through the shared pooled HTTP client (keep-alive
+            # connections, no per-download client setup); bucket-relative paths
+            # use the storage SDK in a thread so the sync call doesn't block
+            # the event loop
+            if storage_path.startswith('http'):
+                try:
+                    return await supabase_service.download_public_file(storage_path)
+                except Exception as url_error:
+                    print(f"Warning: Direct URL download failed for {storage_path}, falling back to storage SDK: {str(url_error)}")
+
+            file_content = await asyncio.to_thread(
+                supabase_service.client.storage.from_(bucket_name).download,
+                file_path
+            )
             return file_content
         except Exception as e:
             # For testing purposes, if file doesn't exist in storage, create mock content
@@ -120,46 +151,49 @@ File Details:
             
             if not files_metadata:
                 raise Exception("No files found for this playbook")
-            
-            # Create ZIP file in memory
+
+            # Resolve each file's in-archive path up front so all storage
+            # downloads can run concurrently instead of one per loop iteration
+            entries = []
+            for file_meta in files_metadata:
+                if source == "original":
+                    # From playbook_files table: file_name, storage_path
+                    file_path = file_meta.get('file_name', 'unknown_file')
+                else:  # forked
+                    # From user_playbook_files table: file_path, storage_path
+                    file_path = file_meta.get('file_path', 'unknown_file')
+                storage_path = file_meta.get('storage_path', '')
+
+                # Ensure we have a valid file path
+                if not file_path or file_path == 'unknown_file':
+                    # Generate a filename based on storage path or use a default
+                    if storage_path:
+                        file_path = os.path.basename(storage_path)
+                    else:
+                        file_path = f"file_{file_meta.get('id', 'unknown')}"
+
+                # Clean the file path to ensure it's safe for ZIP
+                entries.append((self._sanitize_file_path(file_path), storage_path))
+
+            contents = await asyncio.gather(
+                *[self.download_file_from_storage(storage_path, source) for _, storage_path in entries],
+                return_exceptions=True
+            )
+
+            # Create ZIP file in memory. compresslevel=1 because the archive
+            # is network-bound, not size-bound — the fastest deflate setting
+            # costs a few percent of size for a large cut in CPU time
             zip_buffer = BytesIO()
-            
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+
+            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
                 # Add each file to the ZIP with proper folder structure
-                for file_meta in files_metadata:
-                    try:
-                        # Get file path and storage path based on actual schema
-                        if source == "original":
-                            # From playbook_files table: file_name, storage_path
-                            file_path = file_meta.get('file_name', 'unknown_file')
-                            storage_path = file_meta.get('storage_path', '')
-                        else:  # forked
-                            # From user_playbook_files table: file_path, storage_path
-                            file_path = file_meta.get('file_path', 'unknown_file')
-                            storage_path = file_meta.get('storage_path', '')
-                        
-                        # Download file content
-                        file_content = await self.download_file_from_storage(storage_path, source)
-                        
-                        # Ensure we have a valid file path
-                        if not file_path or file_path == 'unknown_file':
-                            # Generate a filename based on storage path or use a default
-                            if storage_path:
-                                file_path = os.path.basename(storage_path)
-                            else:
-                                file_path = f"file_{file_meta.get('id', 'unknown')}"
-                        
-                        # Add file to ZIP with folder structure
-                        # Clean the file path to ensure it's safe for ZIP
-                        safe_file_path = self._sanitize_file_path(file_path)
-                        
-                        zip_file.writestr(safe_file_path, file_content)
-                        
-                    except Exception as e:
-                        print(f"Warning: Failed to add file {file_path} to ZIP: {str(e)}")
+                for (safe_file_path, _), file_content in zip(entries, contents):
+                    if isinstance(file_content, Exception):
+                        print(f"Warning: Failed to add file {safe_file_path} to ZIP: {str(file_content)}")
                         # Continue with other files even if one fails
                         continue
-                
+                    zip_file.writestr(safe_file_path, file_content)
+
                 # Add a README file with playbook information
                 readme_content = self._create_readme_content(playbook_id, source, playbook_title, files_metadata)
                 zip_file.writestr("README.md", readme_content)
@@ -167,10 +201,22 @@ File Details:
             # Reset buffer position to beginning
             zip_buffer.seek(0)
             return zip_buffer
-            
+
         except Exception as e:
             raise Exception(f"Failed to create playbook ZIP: {str(e)}")
-    
+
+    def stream_zip_buffer(self, zip_buffer: BytesIO, chunk_size: int = 64 * 1024):
+        """
+        Yield a finished ZIP buffer in chunks for a StreamingResponse
+
+        Slicing getbuffer() avoids the single read() that duplicated the whole
+        archive in memory — only one chunk is copied at a time.
+        """
+        view = zip_buffer.getbuffer()
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start:start + chunk_size])
+
+
     def _sanitize_file_path(self, file_path: str) -> str:
         """
         Sanitize file path for safe ZIP creation
@@ -0,0 +1,27 @@
+from typing import Any, Dict, Optional
+from app.utils.cache import TTLCache
+
+# Playbook rows change only on update/delete (stars, views, AI results all go
+# through update_playbook), so a short TTL safely absorbs repeat GETs and
+# post-upload status polling. Mutations invalidate their entry immediately.
+_playbook_cache = TTLCache(maxsize=2048, ttl=30.0)
+
+
+def get_cached_playbook(playbook_id: str) -> Optional[Dict[str, Any]]:
+    """Return a cached playbook row, or None on miss/expiry"""
+    cached = _playbook_cache.get(playbook_id)
+    if cached is None:
+        return None
+    # Callers mutate the returned dict (e.g. convert_vector_embedding), so
+    # hand out a copy rather than the cached object
+    return dict(cached)
+
+
+def cache_playbook(playbook_id: str, playbook_data: Dict[str, Any]) -> None:
+    """Cache a playbook row keyed by its ID"""
+    _playbook_cache.set(playbook_id, dict(playbook_data))
+
+
+def invalidate_playbook(playbook_id: str) -> None:
+    """Drop a playbook from the cache after a mutation"""
+    _playbook_cache.pop(playbook_id)
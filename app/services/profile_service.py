@@ -1,6 +1,7 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from app.services.supabase_service import supabase_service
+from app.services.user_cache import invalidate_user
 from app.models.profile import ProfileUpdate, ProfileResponse
 import logging
 
@@ -32,7 +33,7 @@ class ProfileService:
             existing_profile = await self.get_profile(user_id)
             
             # Prepare data for database
-            update_data = profile_data.dict(exclude_unset=True)
+            update_data = profile_data.model_dump(exclude_unset=True)
             
             # Convert website URL to string if present
             if update_data.get('website'):
@@ -41,12 +42,15 @@ class ProfileService:
             if existing_profile:
                 # Update existing profile
                 update_data['updated_at'] = datetime.utcnow().isoformat()
-                
+
                 response = self.supabase.client.table("profiles").update(update_data).eq("id", user_id).execute()
-                
+
                 if not response.data:
                     raise Exception("Failed to update profile")
-                
+
+                # Drop the cached user record so auth paths see fresh data
+                invalidate_user(email)
+
                 return ProfileResponse(**response.data[0])
             else:
                 # Create new profile
@@ -1,24 +1,87 @@
 from supabase import create_client, Client
 from typing import List, Dict, Any, Optional
-import json
+import asyncio
+import httpx
+import logging
 import math
 from datetime import datetime
 import uuid
 from app.config import settings
+from app.services.user_cache import get_cached_user, cache_user, invalidate_user
+from app.services.playbook_cache import get_cached_playbook, cache_playbook, invalidate_playbook
+from app.services.user_playbook_cache import (
+    get_cached_user_playbook, cache_user_playbook, invalidate_user_playbook
+)
+
+logger = logging.getLogger(__name__)
+
+# Gateway errors worth retrying on storage writes; 4xx mean the request
+# itself is bad and re-sending the same bytes can't help
+_TRANSIENT_STATUS_CODES = frozenset({502, 503, 504})
+
+
+def _is_transient_storage_error(exc: Exception) -> bool:
+    """True for transport failures and 5xx gateway responses"""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    status_code = getattr(exc, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(exc, "response", None), "status_code", None)
+    if status_code is None and exc.args and isinstance(exc.args[0], dict):
+        # storage3 wraps the error payload in a dict
+        status_code = exc.args[0].get("statusCode")
+    try:
+        return int(status_code) in _TRANSIENT_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+async def _upload_with_retry(upload_call, *args, **kwargs):
+    """Run a sync storage upload in a thread, retrying transient failures.
+
+    Up to three attempts with exponential backoff (1s, 2s between tries) so a
+    single gateway hiccup doesn't force the client to re-send the whole file;
+    non-transient errors raise immediately.
+    """
+    for attempt in range(3):
+        try:
+            return await asyncio.to_thread(upload_call, *args, **kwargs)
+        except Exception as e:
+            if attempt == 2 or not _is_transient_storage_error(e):
+                raise
+            logger.warning(
+                "⚠️ Transient storage upload failure (attempt %d/3), retrying: %s",
+                attempt + 1, str(e)
+            )
+            await asyncio.sleep(2 ** attempt)
+
+# Every playbooks column except vector_embedding — list endpoints never return
+# the embedding, and a 768-float FP32 array is several KB of PostgREST payload
+# per row that would be parsed and thrown away. Search paths that need the
+# vector use get_playbook_embedding instead.
+_PLAYBOOK_LIST_COLUMNS = (
+    "id,title,description,blog_content,tags,stage,owner_id,version,files,"
+    "summary,star_count,view_count,created_at,updated_at"
+)
 
 
 class SupabaseService:
     def __init__(self):
         self._client = None
         self._service_client = None
-    
+        self._http_client = None
+        # Whether user_playbook_files has the optional uploaded_at /
+        # last_modified_at columns; None until the first insert resolves it,
+        # so the probe-and-retry round trip happens at most once per process
+        self._user_playbook_files_has_timestamps: Optional[bool] = None
+
     @property
     def client(self) -> Client:
         """Lazy initialization of Supabase client"""
         if self._client is None:
             self._client = create_client(settings.supabase_url, settings.supabase_key)
         return self._client
-    
+
     @property
     def service_client(self) -> Client:
         """Lazy initialization of Supabase service client"""
@@ -27,7 +90,35 @@ class SupabaseService:
                 settings.supabase_url, settings.supabase_service_role_key
             )
         return self._service_client
-    
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Shared async HTTP client with keep-alive pooling for storage URL fetches"""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=30.0
+            )
+        return self._http_client
+
+    def warm_up(self) -> None:
+        """Initialize the underlying clients so the first request doesn't pay for it"""
+        _ = self.client
+        _ = self.service_client
+        _ = self.http_client
+
+    async def close(self) -> None:
+        """Close pooled HTTP connections on application shutdown"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def download_public_file(self, url: str) -> bytes:
+        """Download a public storage URL over the shared pooled client"""
+        response = await self.http_client.get(url)
+        response.raise_for_status()
+        return response.content
+
     async def create_user(self, email: str, password: str, full_name: str, hashed_password: str) -> Dict[str, Any]:
         """Create a new user in Supabase Auth and Users table"""
         try:
@@ -48,6 +139,8 @@ class SupabaseService:
             table_response = self.client.table("users").insert(user_data).execute()
             
             if table_response.data:
+                # Drop any stale cache entry for this email
+                invalidate_user(email)
                 # Return user data in the expected format
                 return {
                     "id": user_id,
@@ -59,18 +152,103 @@ class SupabaseService:
         except Exception as e:
             raise Exception(f"Failed to create user: {str(e)}")
     
+    async def register_user_if_absent(self, email: str, full_name: str, hashed_password: str) -> Optional[Dict[str, Any]]:
+        """Atomically create a user unless the email is already taken.
+
+        A single upsert with ignore_duplicates folds the existence check and
+        the insert into one round-trip. Returns the new user data, or None if
+        a user with this email already existed.
+        """
+        try:
+            user_id = str(uuid.uuid4())
+            now = datetime.utcnow().isoformat()
+            user_data = {
+                "id": user_id,
+                "email": email,
+                "full_name": full_name,
+                "hashed_password": hashed_password,
+                "created_at": now,
+                "updated_at": now
+            }
+
+            response = await asyncio.to_thread(
+                self.client.table("users").upsert(
+                    user_data, on_conflict="email", ignore_duplicates=True
+                ).execute
+            )
+
+            if response.data:
+                # Drop any stale cache entry for this email
+                invalidate_user(email)
+                return {
+                    "id": user_id,
+                    "email": email,
+                    "full_name": full_name,
+                    "created_at": now
+                }
+            return None
+        except Exception as e:
+            raise Exception(f"Failed to register user: {str(e)}")
+
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
-        """Get user by email from users table"""
+        """Get user by email from users table (cached for hot auth paths)"""
         try:
+            # Check in-process cache first to skip the DB round-trip
+            cached_user = get_cached_user(email)
+            if cached_user is not None:
+                return cached_user
+
             # Get user from users table
             response = self.client.table("users").select("*").eq("email", email).execute()
             if response.data:
+                cache_user(email, response.data[0])
                 return response.data[0]
             return None
         except Exception as e:
             print(f"Error getting user by email: {str(e)}")
             return None
     
+    async def get_extractions_by_hashes(self, content_hashes: List[str]) -> Dict[str, str]:
+        """Look up cached text extractions for a batch of content hashes.
+
+        Returns a mapping of content_hash -> extracted_text for the hashes
+        that have been ingested before. Best-effort: returns an empty dict if
+        the cache table is missing or the query fails.
+        """
+        try:
+            if not content_hashes:
+                return {}
+
+            response = await asyncio.to_thread(
+                self.client.table("file_extractions").select(
+                    "content_hash, extracted_text"
+                ).in_("content_hash", content_hashes).execute
+            )
+
+            if response.data:
+                return {row["content_hash"]: row["extracted_text"] for row in response.data}
+            return {}
+        except Exception as e:
+            print(f"Error reading extraction cache: {str(e)}")
+            return {}
+
+    async def put_extraction_by_hash(self, content_hash: str, content_type: str, extracted_text: str) -> None:
+        """Store an extraction result keyed by content hash (best-effort)"""
+        try:
+            extraction_data = {
+                "content_hash": content_hash,
+                "content_type": content_type,
+                "extracted_text": extracted_text,
+                "created_at": datetime.utcnow().isoformat()
+            }
+            await asyncio.to_thread(
+                self.client.table("file_extractions").upsert(
+                    extraction_data, on_conflict="content_hash", ignore_duplicates=True
+                ).execute
+            )
+        except Exception as e:
+            print(f"Error writing extraction cache: {str(e)}")
+
     async def create_playbook(self, playbook_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new playbook in the database"""
         try:
@@ -85,13 +263,138 @@ class SupabaseService:
             raise Exception(f"Failed to create playbook: {str(e)}")
     
     async def get_playbook(self, playbook_id: str) -> Optional[Dict[str, Any]]:
-        """Get a playbook by ID"""
+        """Get a playbook by ID (cached briefly to absorb repeat reads)"""
         try:
+            cached_playbook = get_cached_playbook(playbook_id)
+            if cached_playbook is not None:
+                return cached_playbook
+
             response = self.client.table("playbooks").select("*").eq("id", playbook_id).execute()
-            return response.data[0] if response.data else None
+            if response.data:
+                cache_playbook(playbook_id, response.data[0])
+                return response.data[0]
+            return None
         except Exception as e:
             raise Exception(f"Failed to get playbook: {str(e)}")
-    
+
+    async def get_blob_paths_by_hashes(self, content_hashes: List[str]) -> Dict[str, str]:
+        """Look up existing storage paths for a batch of content hashes.
+
+        Returns a mapping of sha256 -> bucket-relative storage path for bytes
+        that already live in storage, so identical re-uploads become
+        server-side copies instead of full byte uploads. Best-effort: returns
+        an empty dict if the table is missing or the query fails.
+        """
+        try:
+            if not content_hashes:
+                return {}
+
+            response = await asyncio.to_thread(
+                self.client.table("object_blobs").select(
+                    "sha256, storage_path"
+                ).in_("sha256", content_hashes).execute
+            )
+
+            if response.data:
+                return {row["sha256"]: row["storage_path"] for row in response.data}
+            return {}
+        except Exception as e:
+            print(f"⚠️ Blob dedupe lookup unavailable: {str(e)}")
+            return {}
+
+    async def put_blob_path(self, sha256: str, storage_path: str) -> None:
+        """Record the canonical storage path for a content hash (best-effort)"""
+        try:
+            await asyncio.to_thread(
+                # Plain upsert so a fresh upload refreshes a stale canonical
+                # path (e.g. after the original playbook was deleted)
+                self.client.table("object_blobs").upsert({
+                    "sha256": sha256,
+                    "storage_path": storage_path
+                }).execute
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to record blob path for {sha256[:12]}: {str(e)}")
+
+    async def get_playbook_embedding(self, playbook_id: str) -> Optional[Any]:
+        """Get just the vector_embedding column for a playbook"""
+        try:
+            response = await asyncio.to_thread(
+                self.client.table("playbooks").select("vector_embedding").eq("id", playbook_id).execute
+            )
+            if response.data:
+                return response.data[0].get("vector_embedding")
+            return None
+        except Exception as e:
+            raise Exception(f"Failed to get playbook embedding: {str(e)}")
+
+    async def get_playbook_status(self, playbook_id: str) -> Optional[Dict[str, Any]]:
+        """Get processing-status fields for a playbook without the embedding blob.
+
+        Uses the get_playbook_processing_status SQL function (see
+        database/processing_status_setup.sql) so polling clients never pull
+        the 768-float vector. Returns None if the playbook doesn't exist, or
+        None on RPC failure so callers can fall back to get_playbook.
+        """
+        try:
+            response = await asyncio.to_thread(
+                self.client.rpc(
+                    "get_playbook_processing_status",
+                    {"p_playbook_id": playbook_id}
+                ).execute
+            )
+            if response.data:
+                return response.data[0]
+            return None
+        except Exception as e:
+            print(f"⚠️ Status RPC unavailable, falling back to full row: {str(e)}")
+            return None
+
+    async def get_playbook_embedding_meta(self, playbook_id: str) -> Optional[Dict[str, Any]]:
+        """Get embedding presence/dimension metadata without the vector itself.
+
+        Uses the get_playbook_embedding_meta SQL function (see
+        database/embedding_meta_setup.sql) so the check is a vector_dims()
+        call in SQL rather than parsing the serialized vector in Python.
+        Returns None if the playbook doesn't exist, or None on RPC failure so
+        callers can fall back to get_playbook.
+        """
+        try:
+            response = await asyncio.to_thread(
+                self.client.rpc(
+                    "get_playbook_embedding_meta",
+                    {"p_playbook_id": playbook_id}
+                ).execute
+            )
+            if response.data:
+                return response.data[0]
+            return None
+        except Exception as e:
+            print(f"⚠️ Embedding meta RPC unavailable, falling back to full row: {str(e)}")
+            return None
+
+    async def check_file_owner(self, file_id: str, playbook_id: str) -> Optional[Dict[str, Any]]:
+        """Authorization probe for file mutations in one round trip.
+
+        Uses the check_file_owner SQL function (see
+        database/file_owner_check_setup.sql) returning file_exists, belongs
+        and owner_id in a single row. Returns None on RPC failure so callers
+        can fall back to the two-query path.
+        """
+        try:
+            response = await asyncio.to_thread(
+                self.client.rpc(
+                    "check_file_owner",
+                    {"p_file_id": file_id, "p_playbook_id": playbook_id}
+                ).execute
+            )
+            if response.data:
+                return response.data[0]
+            return None
+        except Exception as e:
+            logger.warning("⚠️ File owner RPC unavailable, falling back to two queries: %s", str(e))
+            return None
+
     # Simple Star and View Count Methods (using just playbooks table columns)
     async def star_playbook(self, playbook_id: str, user_id: str) -> Dict[str, Any]:
         """Star a playbook for a user (simple approach - just increment count)"""
@@ -166,6 +469,19 @@ class SupabaseService:
             }
         except Exception as e:
             raise Exception(f"Failed to record view: {str(e)}")
+
+    async def increment_playbook_views(self, playbook_id: str, count: int) -> None:
+        """Apply a batch of buffered view events as one count update"""
+        try:
+            playbook = await self.get_playbook(playbook_id)
+            if not playbook:
+                return
+            current_views = playbook.get("view_count", 0)
+            await self.update_playbook(playbook_id, {
+                "view_count": current_views + count
+            })
+        except Exception as e:
+            raise Exception(f"Failed to increment views: {str(e)}")
     
     async def get_popular_playbooks(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get most popular playbooks (simple approach)"""
@@ -182,7 +498,7 @@ class SupabaseService:
     async def get_playbooks(self, user_id: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all playbooks with optional filtering"""
         try:
-            query = self.client.table("playbooks").select("*")
+            query = self.client.table("playbooks").select(_PLAYBOOK_LIST_COLUMNS)
             
             if user_id:
                 query = query.eq("owner_id", user_id)
@@ -243,14 +559,39 @@ class SupabaseService:
         try:
             update_data["updated_at"] = datetime.utcnow().isoformat()
             response = self.client.table("playbooks").update(update_data).eq("id", playbook_id).execute()
+            invalidate_playbook(playbook_id)
             return response.data[0] if response.data else None
         except Exception as e:
             raise Exception(f"Failed to update playbook: {str(e)}")
     
-    async def delete_playbook(self, playbook_id: str) -> bool:
-        """Delete a playbook"""
+    async def update_playbook_owned(self, playbook_id: str, owner_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a playbook with the ownership check fused into the statement.
+
+        UPDATE ... WHERE id AND owner_id replaces the separate
+        get_playbook round trip; an empty result means the playbook doesn't
+        exist or isn't owned by owner_id — callers disambiguate with a cheap
+        (usually cached) get_playbook.
+        """
         try:
-            response = self.client.table("playbooks").delete().eq("id", playbook_id).execute()
+            update_data["updated_at"] = datetime.utcnow().isoformat()
+            response = await asyncio.to_thread(
+                self.client.table("playbooks").update(update_data).eq(
+                    "id", playbook_id
+                ).eq("owner_id", owner_id).execute
+            )
+            invalidate_playbook(playbook_id)
+            return response.data[0] if response.data else None
+        except Exception as e:
+            raise Exception(f"Failed to update playbook: {str(e)}")
+
+    async def delete_playbook(self, playbook_id: str, owner_id: Optional[str] = None) -> bool:
+        """Delete a playbook; with owner_id the ownership check is fused into the statement"""
+        try:
+            query = self.client.table("playbooks").delete().eq("id", playbook_id)
+            if owner_id is not None:
+                query = query.eq("owner_id", owner_id)
+            await asyncio.to_thread(query.execute)
+            invalidate_playbook(playbook_id)
             return True
         except Exception as e:
             raise Exception(f"Failed to delete playbook: {str(e)}")
@@ -258,8 +599,8 @@ class SupabaseService:
     async def search_playbooks_vector(self, query_embedding: List[float], limit: int = 10) -> List[Dict[str, Any]]:
         """Search playbooks using vector similarity"""
         try:
-            print(f"🔍 Searching playbooks with embedding of {len(query_embedding)} dimensions")
-            
+            logger.debug("🔍 Searching playbooks with embedding of %d dimensions", len(query_embedding))
+
             # Using pgvector cosine similarity
             response = self.client.rpc(
                 "match_playbooks",
@@ -269,15 +610,9 @@ class SupabaseService:
                     "match_count": limit
                 }
             ).execute()
-            
-            print(f"✅ Vector search response: {len(response.data) if response.data else 0} results")
-            
-            # Debug: Print the first result to see what fields are available
-            if response.data:
-                print(f"🔍 Debug - First result fields: {list(response.data[0].keys())}")
-                print(f"🔍 Debug - First result: {response.data[0]}")
-                print(f"🔍 Debug - Similarity value: {response.data[0].get('similarity')} (type: {type(response.data[0].get('similarity'))})")
-            
+
+            logger.debug("✅ Vector search response: %d results", len(response.data) if response.data else 0)
+
             if response.data:
                 # Transform the results to match expected format
                 transformed_results = []
@@ -332,22 +667,46 @@ class SupabaseService:
     async def search_playbooks_text(self, query: str, tags: Optional[List[str]] = None, 
                                    stage: Optional[str] = None, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
         """Search playbooks using text search"""
+        # Preferred path: the search_playbooks_fts SQL function (see
+        # database/text_search_setup.sql) — one ranked GIN-indexed query with
+        # the tag/stage filters applied server-side
+        try:
+            response = await asyncio.to_thread(
+                self.client.rpc(
+                    "search_playbooks_fts",
+                    {
+                        "search_query": query,
+                        "filter_tags": tags,
+                        "filter_stage": stage,
+                        "match_limit": limit,
+                        "match_offset": offset
+                    }
+                ).execute
+            )
+            return response.data or []
+        except Exception as rpc_error:
+            print(f"⚠️ FTS function unavailable, falling back to ILIKE search: {str(rpc_error)}")
+
+        # Fallback until the migration is deployed: substring match on
+        # title/description
         try:
-            query_builder = self.client.table("playbooks").select("*")
-            
+            query_builder = self.client.table("playbooks").select(_PLAYBOOK_LIST_COLUMNS)
+
             # Text search in title and description
             query_builder = query_builder.or_(f"title.ilike.%{query}%,description.ilike.%{query}%")
-            
+
             # Filter by tags if provided
             if tags:
                 for tag in tags:
                     query_builder = query_builder.contains("tags", [tag])
-            
+
             # Filter by stage if provided
             if stage:
                 query_builder = query_builder.eq("stage", stage)
-            
-            response = query_builder.range(offset, offset + limit - 1).execute()
+
+            response = await asyncio.to_thread(
+                query_builder.range(offset, offset + limit - 1).execute
+            )
             return response.data
         except Exception as e:
             raise Exception(f"Failed to search playbooks: {str(e)}")
@@ -355,7 +714,10 @@ class SupabaseService:
     async def upload_file_to_storage(self, file_path: str, file_content: bytes, content_type: str) -> str:
         """Upload file to Supabase Storage"""
         try:
-            response = self.client.storage.from_(settings.storage_bucket_name).upload(
+            # The storage SDK is synchronous; run it in a thread so concurrent
+            # uploads can overlap instead of blocking the event loop
+            await _upload_with_retry(
+                self.client.storage.from_(settings.storage_bucket_name).upload,
                 path=file_path,
                 file=file_content,
                 file_options={"content-type": content_type}
@@ -367,10 +729,28 @@ class SupabaseService:
     async def delete_file_from_storage(self, file_path: str) -> bool:
         """Delete file from Supabase Storage"""
         try:
-            self.client.storage.from_(settings.storage_bucket_name).remove([file_path])
+            await asyncio.to_thread(
+                self.client.storage.from_(settings.storage_bucket_name).remove, [file_path]
+            )
             return True
         except Exception as e:
             raise Exception(f"Failed to delete file: {str(e)}")
+
+    async def delete_files_from_storage_bulk(self, file_paths: List[str]) -> bool:
+        """Delete several storage objects in one bulk remove call"""
+        try:
+            if not file_paths:
+                return True
+
+            # remove() takes bucket-relative paths; stored values may be full
+            # public URLs
+            paths = [self._storage_path_from_url(p) for p in file_paths]
+            await asyncio.to_thread(
+                self.client.storage.from_(settings.storage_bucket_name).remove, paths
+            )
+            return True
+        except Exception as e:
+            raise Exception(f"Failed to delete files: {str(e)}")
     
     async def get_file_url(self, file_path: str) -> str:
         """Get public URL for a file"""
@@ -478,6 +858,36 @@ class SupabaseService:
             return response.data
         except Exception as e:
             raise Exception(f"Failed to get playbook files: {str(e)}")
+
+    async def get_playbook_files_slim(self, playbook_id: str) -> tuple:
+        """Get (projected listing rows, exact count) for a playbook's active files.
+
+        Only the three listing columns cross the wire and the count comes from
+        PostgREST's count header rather than len() over full rows.
+        """
+        try:
+            response = await asyncio.to_thread(
+                self.client.table("playbook_files").select(
+                    "file_name,file_type,storage_path", count="exact"
+                ).eq("playbook_id", playbook_id).eq("is_active", True).execute
+            )
+            rows = response.data or []
+            return rows, response.count if response.count is not None else len(rows)
+        except Exception as e:
+            raise Exception(f"Failed to get playbook files: {str(e)}")
+
+    async def get_user_playbook_files_slim(self, user_playbook_id: str) -> tuple:
+        """Get (projected listing rows, exact count) for a user playbook's files"""
+        try:
+            response = await asyncio.to_thread(
+                self.client.table("user_playbook_files").select(
+                    "file_path,file_type,storage_path", count="exact"
+                ).eq("user_playbook_id", user_playbook_id).execute
+            )
+            rows = response.data or []
+            return rows, response.count if response.count is not None else len(rows)
+        except Exception as e:
+            raise Exception(f"Failed to get user playbook files: {str(e)}")
     
     async def get_playbook_files_by_version(self, playbook_id: str, version_number: int) -> List[Dict[str, Any]]:
         """Get files for a specific version of a playbook"""
@@ -499,6 +909,23 @@ class SupabaseService:
         except Exception as e:
             raise Exception(f"Failed to create playbook file: {str(e)}")
 
+    async def create_playbook_files_bulk(self, playbook_files_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create playbook file entries in one array insert (one round-trip for N files)"""
+        try:
+            if not playbook_files_data:
+                return []
+            created_at = datetime.utcnow().isoformat()
+            for file_data in playbook_files_data:
+                file_data["id"] = str(uuid.uuid4())
+                file_data["created_at"] = created_at
+
+            response = await asyncio.to_thread(
+                self.client.table("playbook_files").insert(playbook_files_data).execute
+            )
+            return response.data if response.data else []
+        except Exception as e:
+            raise Exception(f"Failed to create playbook files: {str(e)}")
+
     async def create_user_playbook_file(self, user_playbook_file_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user playbook file entry"""
         try:
@@ -556,7 +983,9 @@ class SupabaseService:
     async def upload_playbook_file_to_storage(self, file_content: bytes, storage_path: str, bucket: str = "playbooks") -> str:
         """Upload a file to Supabase Storage and return the storage path"""
         try:
-            response = self.client.storage.from_(bucket).upload(storage_path, file_content)
+            response = await _upload_with_retry(
+                self.client.storage.from_(bucket).upload, storage_path, file_content
+            )
             if hasattr(response, 'error') and response.error:
                 raise Exception(f"Storage upload error: {response.error}")
             return storage_path
@@ -566,7 +995,7 @@ class SupabaseService:
     async def delete_file_from_storage(self, storage_path: str, bucket: str = "playbooks") -> bool:
         """Delete a file from Supabase Storage"""
         try:
-            response = self.client.storage.from_(bucket).remove([storage_path])
+            await asyncio.to_thread(self.client.storage.from_(bucket).remove, [storage_path])
             return True
         except Exception as e:
             raise Exception(f"Failed to delete file from storage: {str(e)}")
@@ -590,7 +1019,7 @@ class SupabaseService:
     async def list_playbooks(self, owner_id: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
         """List playbooks with optional owner filter"""
         try:
-            query = self.client.table("playbooks").select("*")
+            query = self.client.table("playbooks").select(_PLAYBOOK_LIST_COLUMNS)
             
             if owner_id:
                 query = query.eq("owner_id", owner_id)
@@ -643,55 +1072,124 @@ class SupabaseService:
         except Exception as e:
             raise Exception(f"Failed to list forks: {str(e)}")
 
+    @staticmethod
+    def _storage_path_from_url(storage_path: str) -> str:
+        """Normalize a storage_path that may be a full public URL to a bucket-relative path"""
+        if storage_path.startswith('http'):
+            # Extract path from URL: remove base URL and bucket name
+            path_parts = storage_path.split('/')
+            bucket_index = next(i for i, part in enumerate(path_parts) if part == settings.storage_bucket_name)
+            return '/'.join(path_parts[bucket_index + 1:])
+        return storage_path
+
+    async def _copy_storage_object(self, src_path: str, dst_path: str) -> Optional[str]:
+        """Server-side copy within the bucket — no file bytes cross this process.
+
+        Returns the new public URL, or None when the copy fails so callers can
+        fall back to download+re-upload.
+        """
+        try:
+            await asyncio.to_thread(
+                self.client.storage.from_(settings.storage_bucket_name).copy,
+                src_path,
+                dst_path
+            )
+            return f"{settings.supabase_url}/storage/v1/object/public/{settings.storage_bucket_name}/{dst_path}"
+        except Exception as copy_error:
+            print(f"Server-side copy failed for {src_path}, falling back to download+upload: {str(copy_error)}")
+            return None
+
+    async def _copy_file_with_fallback(self, original_file: Dict[str, Any], new_file_path: str) -> str:
+        """Copy one storage object server-side, with download+upload fallback"""
+        original_storage_path = self._storage_path_from_url(original_file['storage_path'])
+
+        new_storage_url = await self._copy_storage_object(original_storage_path, new_file_path)
+        if new_storage_url is not None:
+            return new_storage_url
+
+        # Fallback: move the bytes through this process
+        try:
+            file_content = await asyncio.to_thread(
+                self.client.storage.from_(settings.storage_bucket_name).download,
+                original_storage_path
+            )
+        except Exception as download_error:
+            raise Exception(f"Failed to download original file {original_storage_path}: {str(download_error)}")
+
+        # Determine content type based on file extension
+        file_extension = original_file['file_name'].split('.')[-1].lower()
+        content_type_map = {
+            'pdf': 'application/pdf',
+            'md': 'text/markdown',
+            'txt': 'text/plain',
+            'csv': 'text/csv',
+            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+            'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            'png': 'image/png',
+            'jpg': 'image/jpeg',
+            'jpeg': 'image/jpeg'
+        }
+        content_type = content_type_map.get(file_extension, 'application/octet-stream')
+
+        return await self.upload_file_to_storage(new_file_path, file_content, content_type)
+
+    async def insert_user_playbook_files(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert user_playbook_files rows, learning the schema's timestamp support once.
+
+        The optional uploaded_at/last_modified_at columns don't exist in every
+        deployment; the first insert probes for them and the outcome is
+        remembered, so later inserts branch cleanly instead of paying a
+        failed round trip each time.
+        """
+        if not rows:
+            return []
+
+        if self._user_playbook_files_has_timestamps is not False:
+            now_iso = datetime.utcnow().isoformat()
+            for row in rows:
+                row.setdefault("uploaded_at", now_iso)
+                row.setdefault("last_modified_at", now_iso)
+            try:
+                response = await asyncio.to_thread(
+                    self.client.table("user_playbook_files").insert(rows).execute
+                )
+                self._user_playbook_files_has_timestamps = True
+                return response.data or []
+            except Exception as timestamp_error:
+                if self._user_playbook_files_has_timestamps:
+                    # Columns are known to exist — this is a real failure
+                    raise
+                logger.warning("Timestamp columns not available, trying without: %s", str(timestamp_error))
+                self._user_playbook_files_has_timestamps = False
+
+        for row in rows:
+            row.pop("uploaded_at", None)
+            row.pop("last_modified_at", None)
+        response = await asyncio.to_thread(
+            self.client.table("user_playbook_files").insert(rows).execute
+        )
+        return response.data or []
+
     async def copy_playbook_files_with_version(self, user_playbook_id: str, original_files: List[Dict[str, Any]], version_number: int = 1) -> List[Dict[str, Any]]:
         """Copy files from original playbook to user playbook with version tracking"""
         try:
-            copied_files = []
-            
-            for original_file in original_files:
-                # Generate new storage path for the copied file
-                new_file_path = f"user_playbooks/{user_playbook_id}/{original_file['file_name']}"
-                
-                # Extract the actual storage path from the original file
-                # storage_path might be a full URL or just a path
-                original_storage_path = original_file['storage_path']
-                if original_storage_path.startswith('http'):
-                    # Extract path from URL: remove base URL and bucket name
-                    path_parts = original_storage_path.split('/')
-                    bucket_index = next(i for i, part in enumerate(path_parts) if part == settings.storage_bucket_name)
-                    original_storage_path = '/'.join(path_parts[bucket_index + 1:])
-                
-                # Download original file content from storage
-                try:
-                    file_content = self.client.storage.from_(settings.storage_bucket_name).download(original_storage_path)
-                except Exception as download_error:
-                    raise Exception(f"Failed to download original file {original_storage_path}: {str(download_error)}")
-                
-                # Determine content type based on file extension
-                file_extension = original_file['file_name'].split('.')[-1].lower()
-                content_type_map = {
-                    'pdf': 'application/pdf',
-                    'md': 'text/markdown',
-                    'txt': 'text/plain',
-                    'csv': 'text/csv',
-                    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    'png': 'image/png',
-                    'jpg': 'image/jpeg',
-                    'jpeg': 'image/jpeg'
-                }
-                content_type = content_type_map.get(file_extension, 'application/octet-stream')
-                
-                # Upload to new location in user_playbooks storage
-                new_storage_url = await self.upload_file_to_storage(
-                    new_file_path, 
-                    file_content, 
-                    content_type
-                )
-                
-                # Create new file entry in user_playbook_files table with version tracking
-                # Start with basic required fields
-                file_data = {
+            # Copy all storage objects concurrently; server-side copy keeps
+            # the bytes inside Supabase entirely
+            copy_semaphore = asyncio.Semaphore(16)
+
+            async def copy_one(original_file):
+                async with copy_semaphore:
+                    new_file_path = f"user_playbooks/{user_playbook_id}/{original_file['file_name']}"
+                    return await self._copy_file_with_fallback(original_file, new_file_path)
+
+            new_storage_urls = await asyncio.gather(*[copy_one(f) for f in original_files])
+
+            # Build all user_playbook_files rows with version tracking and
+            # insert them in one multi-row statement instead of one round
+            # trip per file
+            rows = []
+            for original_file, new_storage_url in zip(original_files, new_storage_urls):
+                rows.append({
                     "id": str(uuid.uuid4()),
                     "user_playbook_id": user_playbook_id,
                     "file_path": original_file['file_name'],  # Relative path within the playbook
@@ -700,32 +1198,9 @@ class SupabaseService:
                     "version": "v1",
                     "version_created": version_number,  # Version tracking
                     "is_active": True
-                }
-                
-                # Try to add optional timestamp fields if they exist
-                try:
-                    file_data.update({
-                        "uploaded_at": datetime.utcnow().isoformat(),
-                        "last_modified_at": datetime.utcnow().isoformat()
-                    })
-                    
-                    response = self.client.table("user_playbook_files").insert(file_data).execute()
-                    if response.data:
-                        copied_files.append(response.data[0])
-                        
-                except Exception as timestamp_error:
-                    # If timestamp columns don't exist, try without them
-                    print(f"Timestamp columns not available, trying without: {str(timestamp_error)}")
-                    
-                    # Remove timestamp fields and try again
-                    file_data.pop("uploaded_at", None)
-                    file_data.pop("last_modified_at", None)
-                    
-                    response = self.client.table("user_playbook_files").insert(file_data).execute()
-                    if response.data:
-                        copied_files.append(response.data[0])
-            
-            return copied_files
+                })
+
+            return await self.insert_user_playbook_files(rows)
         except Exception as e:
             raise Exception(f"Failed to copy playbook files: {str(e)}")
     
@@ -736,51 +1211,23 @@ class SupabaseService:
     async def copy_playbook_files_to_new_playbook(self, new_playbook_id: str, original_files: List[Dict[str, Any]], user_id: str) -> List[Dict[str, Any]]:
         """Copy files from original playbook to a new playbook record in the playbooks table"""
         try:
-            copied_files = []
-            
-            for original_file in original_files:
-                # Generate new storage path for the copied file
-                new_file_path = f"playbook/{new_playbook_id}/{user_id}/v1/{original_file['file_name']}"
-                
-                # Extract the actual storage path from the original file
-                # storage_path might be a full URL or just a path
-                original_storage_path = original_file['storage_path']
-                if original_storage_path.startswith('http'):
-                    # Extract path from URL: remove base URL and bucket name
-                    path_parts = original_storage_path.split('/')
-                    bucket_index = next(i for i, part in enumerate(path_parts) if part == settings.storage_bucket_name)
-                    original_storage_path = '/'.join(path_parts[bucket_index + 1:])
-                
-                # Download original file content from storage
-                try:
-                    file_content = self.client.storage.from_(settings.storage_bucket_name).download(original_storage_path)
-                except Exception as download_error:
-                    raise Exception(f"Failed to download original file {original_storage_path}: {str(download_error)}")
-                
-                # Determine content type based on file extension
-                file_extension = original_file['file_name'].split('.')[-1].lower()
-                content_type_map = {
-                    'pdf': 'application/pdf',
-                    'md': 'text/markdown',
-                    'txt': 'text/plain',
-                    'csv': 'text/csv',
-                    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    'png': 'image/png',
-                    'jpg': 'image/jpeg',
-                    'jpeg': 'image/jpeg'
-                }
-                content_type = content_type_map.get(file_extension, 'application/octet-stream')
-                
-                # Upload to new location in playbook storage
-                new_storage_url = await self.upload_file_to_storage(
-                    new_file_path, 
-                    file_content, 
-                    content_type
-                )
-                
-                # Create new file entry in playbook_files table
-                file_data = {
+            # Copy all storage objects concurrently; server-side copy keeps
+            # the bytes inside Supabase entirely
+            copy_semaphore = asyncio.Semaphore(16)
+
+            async def copy_one(original_file):
+                async with copy_semaphore:
+                    new_file_path = f"playbook/{new_playbook_id}/{user_id}/v1/{original_file['file_name']}"
+                    return await self._copy_file_with_fallback(original_file, new_file_path)
+
+            new_storage_urls = await asyncio.gather(*[copy_one(f) for f in original_files])
+
+            # Build all playbook_files rows and insert them in one multi-row
+            # statement instead of one round trip per file
+            now_iso = datetime.utcnow().isoformat()
+            rows = []
+            for original_file, new_storage_url in zip(original_files, new_storage_urls):
+                rows.append({
                     "id": str(uuid.uuid4()),
                     "playbook_id": new_playbook_id,
                     "file_name": original_file['file_name'],
@@ -788,47 +1235,52 @@ class SupabaseService:
                     "storage_path": new_storage_url,
                     "uploaded_by": user_id,
                     "version_created": 1,  # Initial version for the new playbook
-                    "is_active": True
-                }
-                
-                # Try to add optional timestamp fields if they exist
-                try:
-                    file_data.update({
-                        "uploaded_at": datetime.utcnow().isoformat(),
-                        "last_modified_at": datetime.utcnow().isoformat()
-                    })
-                    
-                    response = self.client.table("playbook_files").insert(file_data).execute()
-                    if response.data:
-                        copied_files.append(response.data[0])
-                        
-                except Exception as timestamp_error:
-                    # If timestamp columns don't exist, try without them
-                    print(f"Timestamp columns not available, trying without: {str(timestamp_error)}")
-                    
-                    # Remove timestamp fields and try again
-                    file_data.pop("uploaded_at", None)
-                    file_data.pop("last_modified_at", None)
-                    
-                    response = self.client.table("playbook_files").insert(file_data).execute()
-                    if response.data:
-                        copied_files.append(response.data[0])
-            
-            return copied_files
+                    "is_active": True,
+                    "uploaded_at": now_iso,
+                    "last_modified_at": now_iso
+                })
+
+            if not rows:
+                return []
+
+            try:
+                response = await asyncio.to_thread(
+                    self.client.table("playbook_files").insert(rows).execute
+                )
+            except Exception as timestamp_error:
+                # If timestamp columns don't exist, retry the batch without them
+                print(f"Timestamp columns not available, trying without: {str(timestamp_error)}")
+                for row in rows:
+                    row.pop("uploaded_at", None)
+                    row.pop("last_modified_at", None)
+                response = await asyncio.to_thread(
+                    self.client.table("playbook_files").insert(rows).execute
+                )
+
+            return response.data or []
         except Exception as e:
             raise Exception(f"Failed to copy playbook files to new playbook: {str(e)}")
 
     async def get_user_playbook(self, user_playbook_id: str) -> Optional[Dict[str, Any]]:
         """Get a user playbook by ID with original playbook details"""
         try:
-            response = self.client.table("user_playbooks").select("""
-                *,
-                playbooks!user_playbooks_original_playbook_id_fkey (
-                    id, title, description, tags, stage, version, created_at
-                )
-            """).eq("id", user_playbook_id).execute()
-            
-            return response.data[0] if response.data else None
+            cached = get_cached_user_playbook(user_playbook_id)
+            if cached is not None:
+                return cached
+
+            response = await asyncio.to_thread(
+                self.client.table("user_playbooks").select("""
+                    *,
+                    playbooks!user_playbooks_original_playbook_id_fkey (
+                        id, title, description, tags, stage, version, created_at
+                    )
+                """).eq("id", user_playbook_id).execute
+            )
+
+            if response.data:
+                cache_user_playbook(user_playbook_id, response.data[0])
+                return response.data[0]
+            return None
         except Exception as e:
             raise Exception(f"Failed to get user playbook: {str(e)}")
 
@@ -907,6 +1359,7 @@ class SupabaseService:
         """Delete a user playbook entry"""
         try:
             response = self.client.table("user_playbooks").delete().eq("id", user_playbook_id).execute()
+            invalidate_user_playbook(user_playbook_id)
             return True
         except Exception as e:
             raise Exception(f"Failed to delete user playbook: {str(e)}")
@@ -914,22 +1367,55 @@ class SupabaseService:
     async def get_user_playbooks(self, user_id: str, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all user playbooks for a specific user"""
         try:
-            response = self.client.table("user_playbooks").select("""
-                *,
-                playbooks!user_playbooks_original_playbook_id_fkey (
-                    id, title, description, tags, stage, version, created_at
-                )
-            """).eq("user_id", user_id).range(offset, offset + limit - 1).execute()
-            
+            # Embedded resource = one LEFT JOIN server-side; the fork
+            # transformation loops read up['playbooks'] without issuing a
+            # per-row fetch for the original playbook
+            response = await asyncio.to_thread(
+                self.client.table("user_playbooks").select("""
+                    *,
+                    playbooks!user_playbooks_original_playbook_id_fkey (
+                        id, title, description, tags, stage, version, created_at
+                    )
+                """).eq("user_id", user_id).range(offset, offset + limit - 1).execute
+            )
+
             return response.data
         except Exception as e:
             raise Exception(f"Failed to get user playbooks: {str(e)}")
 
+    async def user_has_fork(self, user_id: str, original_playbook_id: str) -> bool:
+        """Check whether a user already forked a playbook with one indexed query"""
+        try:
+            response = await asyncio.to_thread(
+                self.client.table("user_playbooks").select("id").eq(
+                    "user_id", user_id
+                ).eq("original_playbook_id", original_playbook_id).limit(1).execute
+            )
+
+            return bool(response.data)
+        except Exception as e:
+            raise Exception(f"Failed to check existing fork: {str(e)}")
+
+    async def get_user_fork_for_playbook(self, user_id: str, original_playbook_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user's fork of a playbook with one indexed query"""
+        try:
+            response = await asyncio.to_thread(
+                self.client.table("user_playbooks").select(
+                    "id,forked_at,version,status"
+                ).eq("user_id", user_id).eq(
+                    "original_playbook_id", original_playbook_id
+                ).limit(1).execute
+            )
+            return response.data[0] if response.data else None
+        except Exception as e:
+            raise Exception(f"Failed to get user fork: {str(e)}")
+
     async def update_user_playbook(self, user_playbook_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a user playbook entry"""
         try:
             update_data["last_updated_at"] = datetime.utcnow().isoformat()
             response = self.client.table("user_playbooks").update(update_data).eq("id", user_playbook_id).execute()
+            invalidate_user_playbook(user_playbook_id)
             return response.data[0] if response.data else None
         except Exception as e:
             raise Exception(f"Failed to update user playbook: {str(e)}")
@@ -1064,9 +1550,22 @@ class SupabaseService:
     async def get_user_notifications(self, user_id: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
         """Get notifications for a user from the notifications table"""
         try:
-            # Query the notifications table directly
-            response = self.client.table("notifications").select("*").eq("recipient_id", user_id).order("created_at", desc=True).range(offset, offset + limit - 1).execute()
-            
+            # Query the notifications table directly, filtering out rows with
+            # missing required fields in SQL so pages stay full — filtering
+            # after pagination returned short pages
+            response = await asyncio.to_thread(
+                self.client.table("notifications").select("*")
+                .eq("recipient_id", user_id)
+                .not_.is_("playbook_id", "null")
+                .not_.is_("playbook_title", "null")
+                .not_.is_("user_id", "null")
+                .not_.is_("user_email", "null")
+                .not_.is_("user_full_name", "null")
+                .order("created_at", desc=True)
+                .range(offset, offset + limit - 1)
+                .execute
+            )
+
             return response.data if response.data else []
         except Exception as e:
             print(f"Error in get_user_notifications: {str(e)}")
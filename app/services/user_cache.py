@@ -0,0 +1,22 @@
+from typing import Any, Dict, Optional
+from app.utils.cache import TTLCache
+
+
+# Users rarely change, but keep the TTL short so profile edits show up quickly.
+# Keyed by lowercased email so case variations share one entry.
+_user_cache = TTLCache(maxsize=10_000, ttl=30.0)
+
+
+def get_cached_user(email: str) -> Optional[Dict[str, Any]]:
+    """Get a cached user record by email, or None on miss/expiry"""
+    return _user_cache.get(email.lower())
+
+
+def cache_user(email: str, user: Dict[str, Any]) -> None:
+    """Cache a user record by email"""
+    _user_cache.set(email.lower(), user)
+
+
+def invalidate_user(email: str) -> None:
+    """Drop a cached user after registration or profile updates"""
+    _user_cache.pop(email.lower())
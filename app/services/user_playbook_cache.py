@@ -0,0 +1,27 @@
+from typing import Any, Dict, Optional
+from app.utils.cache import TTLCache
+
+# Fork endpoints fetch the user_playbook row mostly for existence and
+# ownership checks, often several times in quick succession (sync status,
+# file uploads, downloads). Rows only change through update/delete, which
+# invalidate their entry immediately.
+_user_playbook_cache = TTLCache(maxsize=2048, ttl=30.0)
+
+
+def get_cached_user_playbook(user_playbook_id: str) -> Optional[Dict[str, Any]]:
+    """Return a cached user playbook row, or None on miss/expiry"""
+    cached = _user_playbook_cache.get(user_playbook_id)
+    if cached is None:
+        return None
+    # Hand out a copy so callers can't mutate the cached object
+    return dict(cached)
+
+
+def cache_user_playbook(user_playbook_id: str, row: Dict[str, Any]) -> None:
+    """Cache a user playbook row keyed by its ID"""
+    _user_playbook_cache.set(user_playbook_id, dict(row))
+
+
+def invalidate_user_playbook(user_playbook_id: str) -> None:
+    """Drop a user playbook from the cache after a mutation"""
+    _user_playbook_cache.pop(user_playbook_id)
@@ -1,20 +1,24 @@
 import google.generativeai as genai
 from typing import List, Dict, Any, Optional, Tuple
 import asyncio
-import json
 import uuid
 from datetime import datetime
 import numpy as np
 from app.config import settings
 from app.services.supabase_service import supabase_service
+from app.services.ai_service import ai_service
+from app.utils.cache import TTLCache
 
 
 class VectorService:
     """Service for managing vector embeddings and vector database operations"""
-    
+
     def __init__(self):
         self._embedding_model = None
         self._configured = False
+        # Search queries follow a heavy-hitter distribution, so repeated
+        # queries skip the embedding API round-trip for an hour
+        self._query_embedding_cache = TTLCache(maxsize=2048, ttl=3600.0)
     
     def _configure(self):
         """Lazy configuration of Gemini embedding model"""
@@ -47,8 +51,10 @@ class VectorService:
             # Prepare text for embedding (limit to avoid token limits)
             embedding_text = f"File: {filename}\nType: {content_type}\nContent: {file_content[:6000]}"
             
-            # Create embedding using Google's API
-            embedding_result = genai.embed_content(
+            # Create embedding using Google's API (in a thread: the SDK is
+            # synchronous and would otherwise block the event loop)
+            embedding_result = await asyncio.to_thread(
+                genai.embed_content,
                 model=self.embedding_model,
                 content=embedding_text
             )
@@ -81,35 +87,40 @@ class VectorService:
             norm = np.linalg.norm(embedding_array)
             if norm > 0:
                 normalized = embedding_array / norm
-                return normalized.tolist()
+                # Round to 6 decimals: unit-norm components carry no useful
+                # precision beyond that, and it shrinks the JSON wire format
+                # of each 768-dim vector substantially
+                return np.round(normalized, 6).tolist()
             return embedding
         except Exception as e:
             print(f"Error normalizing embedding: {str(e)}")
             return embedding
     
-    async def store_file_vectors(self, files: List[Dict[str, Any]], playbook_id: str) -> Dict[str, Any]:
+    async def store_file_vectors(self, files: List[Dict[str, Any]], playbook_id: str, embeddings: Optional[List[List[float]]] = None) -> Dict[str, Any]:
         """
         Store file embeddings in vector database
-        
+
         Args:
             files: List of file information with content, filename, content_type
             playbook_id: ID of the playbook these files belong to
-            
+            embeddings: Optional pre-computed embeddings (one per file); when
+                omitted, all files are embedded in a single batched API call
+
         Returns:
             Dictionary with vector storage results
         """
         try:
+            if embeddings is None:
+                # One batched call embeds every file together instead of N
+                # round-trips to the embeddings API
+                embedding_texts = [
+                    f"File: {f['filename']}\nType: {f['content_type']}\nContent: {f['content'][:6000]}"
+                    for f in files
+                ]
+                embeddings = await ai_service.create_embeddings_batch(embedding_texts)
+
             vector_records = []
-            
-            # Process each file and create embeddings
-            for file_info in files:
-                # Create embedding for the file
-                embedding = await self.create_file_embedding(
-                    file_info['content'],
-                    file_info['filename'],
-                    file_info['content_type']
-                )
-                
+            for file_info, embedding in zip(files, embeddings):
                 # Create vector record
                 vector_record = {
                     "id": str(uuid.uuid4()),
@@ -158,26 +169,17 @@ class VectorService:
             List of successfully stored vector records
         """
         try:
-            stored_records = []
-            
-            for record in vector_records:
-                # Store in the file_vectors table
-                result = supabase_service.client.table('file_vectors').insert({
-                    "id": record["id"],
-                    "playbook_id": record["playbook_id"],
-                    "filename": record["filename"],
-                    "content_type": record["content_type"],
-                    "embedding": record["embedding"],
-                    "file_size": record["file_size"],
-                    "created_at": record["created_at"],
-                    "metadata": record["metadata"]
-                }).execute()
-                
-                if result.data:
-                    stored_records.append(record)
-            
-            return stored_records
-            
+            if not vector_records:
+                return []
+
+            # Insert the whole batch in a single request instead of one
+            # round-trip per record
+            result = await asyncio.to_thread(
+                supabase_service.client.table('file_vectors').insert(vector_records).execute
+            )
+
+            return vector_records if result.data else []
+
         except Exception as e:
             print(f"Error storing vectors in database: {str(e)}")
             return []
@@ -194,9 +196,14 @@ class VectorService:
             List of similar files with similarity scores
         """
         try:
-            # Create embedding for the query
-            query_embedding = await self.create_file_embedding(query, "query", "text/plain")
-            
+            # Create embedding for the query, reusing a cached vector for
+            # repeat queries (normalized on whitespace and case)
+            cache_key = " ".join(query.lower().split())
+            query_embedding = self._query_embedding_cache.get(cache_key)
+            if query_embedding is None:
+                query_embedding = await self.create_file_embedding(query, "query", "text/plain")
+                self._query_embedding_cache.set(cache_key, query_embedding)
+
             # Search using vector similarity in Supabase
             result = supabase_service.client.rpc(
                 'search_file_vectors',
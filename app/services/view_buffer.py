@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# View recording is fire-and-forget: buffer events in memory and flush them
+# as aggregated count updates every couple of seconds, so a burst of GETs
+# costs one DB round-trip per viewed playbook per window instead of one
+# read-modify-write per request. Created in start() rather than at import
+# because asyncio primitives bind to the running loop on Python 3.9.
+_FLUSH_INTERVAL = 2.0
+_MAX_BATCH = 500
+_QUEUE_SIZE = 10_000
+
+_queue: Optional[asyncio.Queue] = None
+_flusher_task: Optional[asyncio.Task] = None
+_dropped = 0
+
+
+def record_view(playbook_id: str) -> None:
+    """Enqueue a view event without awaiting the database (O(1), lossy on overload)"""
+    global _dropped
+    if _queue is None:
+        return
+    try:
+        _queue.put_nowait(playbook_id)
+    except asyncio.QueueFull:
+        # Dropping a view beats backpressuring reads; keep a count for logs
+        _dropped += 1
+        if _dropped % 1000 == 1:
+            logger.warning(f"⚠️ View buffer full, dropped {_dropped} view events so far")
+
+
+async def _flush(batch) -> None:
+    from app.services.supabase_service import supabase_service
+
+    counts = {}
+    for playbook_id in batch:
+        counts[playbook_id] = counts.get(playbook_id, 0) + 1
+
+    for playbook_id, count in counts.items():
+        try:
+            await supabase_service.increment_playbook_views(playbook_id, count)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to flush {count} views for playbook {playbook_id}: {e}")
+
+
+async def _flusher() -> None:
+    while True:
+        batch = [await _queue.get()]
+        # Give trailing events in the same window a chance to coalesce
+        await asyncio.sleep(_FLUSH_INTERVAL)
+        while len(batch) < _MAX_BATCH:
+            try:
+                batch.append(_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        await _flush(batch)
+
+
+def start() -> None:
+    """Create the buffer and start the flusher on the running loop (call at startup)"""
+    global _queue, _flusher_task
+    if _flusher_task is not None:
+        return
+    _queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+    _flusher_task = asyncio.create_task(_flusher())
+
+
+async def stop() -> None:
+    """Cancel the flusher and flush whatever is still buffered (call at shutdown)"""
+    global _flusher_task
+    if _flusher_task is None:
+        return
+    _flusher_task.cancel()
+    try:
+        await _flusher_task
+    except asyncio.CancelledError:
+        pass
+    _flusher_task = None
+
+    remaining = []
+    while True:
+        try:
+            remaining.append(_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    if remaining:
+        await _flush(remaining)
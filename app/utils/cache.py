@@ -0,0 +1,47 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class TTLCache:
+    """Simple in-process TTL + LRU cache for hot lookups.
+
+    Entries expire after `ttl` seconds and the least recently used entry is
+    evicted once `maxsize` is reached. Safe for single event loop usage
+    (no await between check and update inside a request handler).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: Dict[Any, Tuple[float, Any]] = {}
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        # Refresh recency by re-inserting (dicts preserve insertion order)
+        self._data.pop(key, None)
+        self._data[key] = (expires_at, value)
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        """Store a value with the configured TTL"""
+        if key in self._data:
+            self._data.pop(key, None)
+        elif len(self._data) >= self.maxsize:
+            # Evict the least recently used entry
+            self._data.pop(next(iter(self._data)), None)
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key: Any) -> None:
+        """Remove a single entry (cache invalidation)"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._data.clear()
@@ -2,12 +2,12 @@ import os
 import uuid
 from typing import List, Dict, Any
 from fastapi import UploadFile, HTTPException
-from app.config import settings
+from app.config import settings, ALLOWED_FILE_TYPES
 
 
 def validate_file_type(file: UploadFile) -> bool:
     """Validate if file type is allowed"""
-    return file.content_type in settings.allowed_file_types
+    return file.content_type in ALLOWED_FILE_TYPES
 
 
 def validate_file_size(file: UploadFile, max_size: int = None) -> bool:
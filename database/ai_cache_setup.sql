@@ -0,0 +1,11 @@
+-- AI Results Cache Setup
+-- Run this in your Supabase SQL editor
+
+-- Stores the summarize/tag/stage results keyed by a content hash of the
+-- playbook inputs (title, description, blog content, file hashes, model id)
+-- so re-uploads of identical content skip the multi-second LLM round-trip
+CREATE TABLE IF NOT EXISTS ai_results_cache (
+    cache_key TEXT PRIMARY KEY,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
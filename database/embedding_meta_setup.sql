@@ -0,0 +1,30 @@
+-- Embedding Metadata Lookup Setup
+-- Run this in your Supabase SQL editor
+
+-- The embedding-status debug endpoint only needs presence and dimension of
+-- the playbook embedding; vector_dims() answers both in SQL without
+-- serializing the 768-float vector out of the database
+CREATE OR REPLACE FUNCTION get_playbook_embedding_meta(p_playbook_id UUID)
+RETURNS TABLE (
+    has_embedding BOOLEAN,
+    embedding_dims INTEGER,
+    summary TEXT,
+    tags TEXT[],
+    stage TEXT
+)
+LANGUAGE plpgsql
+STABLE PARALLEL SAFE
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        p.vector_embedding IS NOT NULL,
+        CASE WHEN p.vector_embedding IS NULL THEN 0
+             ELSE vector_dims(p.vector_embedding) END,
+        p.summary,
+        p.tags,
+        p.stage
+    FROM playbooks p
+    WHERE p.id = p_playbook_id;
+END;
+$$;
@@ -0,0 +1,11 @@
+-- File Extraction Dedupe Cache Setup
+-- Run this in your Supabase SQL editor
+
+-- Stores extracted text keyed by content hash so re-uploads of identical
+-- files (common for forked/versioned playbooks) skip the CPU-heavy parsers
+CREATE TABLE IF NOT EXISTS file_extractions (
+    content_hash TEXT PRIMARY KEY,
+    content_type TEXT,
+    extracted_text TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
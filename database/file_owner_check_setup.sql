@@ -0,0 +1,24 @@
+-- File Ownership Check Setup
+-- Run this in your Supabase SQL editor
+
+-- Single round-trip authorization probe for the playbook-file write
+-- endpoints: one row answering "does the file exist", "does it belong to
+-- this playbook" and "who owns the playbook", replacing two sequential
+-- lookups per request
+CREATE OR REPLACE FUNCTION check_file_owner(p_file_id UUID, p_playbook_id UUID)
+RETURNS TABLE (
+    file_exists BOOLEAN,
+    belongs BOOLEAN,
+    owner_id UUID
+)
+LANGUAGE sql
+STABLE PARALLEL SAFE
+AS $$
+    SELECT
+        f.id IS NOT NULL,
+        f.playbook_id = p_playbook_id,
+        p.owner_id
+    FROM (SELECT 1) AS one
+    LEFT JOIN playbook_files f ON f.id = p_file_id
+    LEFT JOIN playbooks p ON p.id = p_playbook_id;
+$$;
@@ -0,0 +1,9 @@
+-- Fork Dedupe Index Setup
+-- Run this in your Supabase SQL editor
+
+-- The duplicate-fork check in fork_playbook is a single
+-- (user_id, original_playbook_id) lookup; this unique index turns it into an
+-- index scan and makes the one-fork-per-user rule a database guarantee
+-- instead of an application-level check
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_playbooks_user_original_unique
+ON user_playbooks(user_id, original_playbook_id);
@@ -0,0 +1,25 @@
+-- HNSW Vector Index Setup
+-- Run this in your Supabase SQL editor
+
+-- Replace the IVFFlat indexes from setup.sql with HNSW. IVFFlat's recall
+-- degrades as rows drift from the centroids it was built on (and it needs
+-- periodic reindexing); HNSW keeps recall stable as data grows and pgvector
+-- prefers it for the ORDER BY ... <=> ... LIMIT k plans used by
+-- match_playbooks and search_file_vectors.
+-- Requires pgvector >= 0.5.
+
+CREATE INDEX IF NOT EXISTS idx_playbooks_vector_hnsw
+ON playbooks USING hnsw (vector_embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS idx_file_vectors_embedding_hnsw
+ON file_vectors USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Drop the superseded IVFFlat indexes so the planner doesn't pick them
+DROP INDEX IF EXISTS idx_playbooks_vector;
+DROP INDEX IF EXISTS idx_file_vectors_embedding;
+
+-- Optional, per session or via ALTER DATABASE: raise the search beam width
+-- for better recall at a small latency cost (default is 40)
+-- SET hnsw.ef_search = 40;
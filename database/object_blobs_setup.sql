@@ -0,0 +1,11 @@
+-- Object Blob Dedupe Setup
+-- Run this in your Supabase SQL editor
+
+-- Maps a file's SHA-256 to the first storage path its bytes landed at, so
+-- re-uploads of identical content become cheap server-side copies instead of
+-- pushing the same bytes through the API again
+CREATE TABLE IF NOT EXISTS object_blobs (
+    sha256 TEXT PRIMARY KEY,
+    storage_path TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
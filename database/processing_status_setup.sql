@@ -0,0 +1,27 @@
+-- Processing Status Lookup Setup
+-- Run this in your Supabase SQL editor
+
+-- Lightweight status probe for the post-upload polling endpoint: returns
+-- whether the summary/embedding exist (plus the small text fields) without
+-- shipping the 768-float vector_embedding blob on every poll
+CREATE OR REPLACE FUNCTION get_playbook_processing_status(p_playbook_id UUID)
+RETURNS TABLE (
+    has_summary BOOLEAN,
+    has_embedding BOOLEAN,
+    summary TEXT,
+    tags TEXT[]
+)
+LANGUAGE plpgsql
+STABLE PARALLEL SAFE
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        p.summary IS NOT NULL,
+        p.vector_embedding IS NOT NULL,
+        p.summary,
+        p.tags
+    FROM playbooks p
+    WHERE p.id = p_playbook_id;
+END;
+$$;
@@ -0,0 +1,58 @@
+-- Full-Text Search Setup
+-- Run this in your Supabase SQL editor
+
+-- Stored tsvector over the searchable text fields. The expression GIN index
+-- in setup.sql only covered title/description and forced the ILIKE path to
+-- recompute to_tsvector per row anyway; a generated column is indexed once
+-- per write and matched with @@ at query time.
+ALTER TABLE playbooks
+ADD COLUMN IF NOT EXISTS search_tsv tsvector
+GENERATED ALWAYS AS (
+    to_tsvector('english',
+        title || ' ' || COALESCE(description, '') || ' ' || COALESCE(blog_content, ''))
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_playbooks_search_tsv
+ON playbooks USING gin(search_tsv);
+
+-- Text search entry point: word-level match via websearch_to_tsquery with
+-- the tag/stage filters applied in the same statement. Returns the listing
+-- columns only — no vector_embedding, no search_tsv.
+CREATE OR REPLACE FUNCTION search_playbooks_fts(
+    search_query TEXT,
+    filter_tags TEXT[] DEFAULT NULL,
+    filter_stage TEXT DEFAULT NULL,
+    match_limit INTEGER DEFAULT 10,
+    match_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    id UUID,
+    title TEXT,
+    description TEXT,
+    blog_content TEXT,
+    tags TEXT[],
+    stage TEXT,
+    owner_id UUID,
+    version TEXT,
+    files JSONB,
+    summary TEXT,
+    star_count INTEGER,
+    view_count INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE
+)
+LANGUAGE sql
+STABLE PARALLEL SAFE
+AS $$
+    SELECT
+        p.id, p.title, p.description, p.blog_content, p.tags, p.stage,
+        p.owner_id, p.version, p.files, p.summary, p.star_count,
+        p.view_count, p.created_at, p.updated_at
+    FROM playbooks p
+    WHERE p.search_tsv @@ websearch_to_tsquery('english', search_query)
+      AND (filter_tags IS NULL OR p.tags @> filter_tags)
+      AND (filter_stage IS NULL OR p.stage = filter_stage)
+    ORDER BY ts_rank(p.search_tsv, websearch_to_tsquery('english', search_query)) DESC,
+             p.created_at DESC
+    LIMIT match_limit OFFSET match_offset;
+$$;
@@ -0,0 +1,14 @@
+-- Trigram Index Setup
+-- Run this in your Supabase SQL editor
+
+-- The ILIKE fallback in search_playbooks_text (and any other substring
+-- matching on playbooks) sequential-scans without this. pg_trgm GIN indexes
+-- serve ILIKE '%term%' directly, including the case-insensitive form, so the
+-- fallback becomes an index probe instead of a table scan.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_playbooks_title_trgm
+ON playbooks USING gin (title gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_playbooks_description_trgm
+ON playbooks USING gin (description gin_trgm_ops);